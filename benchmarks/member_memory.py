@@ -0,0 +1,62 @@
+""" Compares memory use and construction speed of the regular and the __slots__ based member classes
+
+Usage: python benchmarks/member_memory.py [--sizes 10000 100000 ...]
+
+Note that the largest default size creates ten million pupils per class,
+which needs several gigabytes of RAM.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from magical_universe import (CastleKilmereMember, Professor, Ghost, Pupil,
+                              CompactCastleKilmereMember, CompactProfessor, CompactGhost, CompactPupil)
+
+CLASSES = [
+    (CastleKilmereMember, CompactCastleKilmereMember, ('Bromley Huckabee', 1959, 'male')),
+    (Professor, CompactProfessor, ('Birdie Briddle', 1931, 'female', 'Foreign Magical Systems', 'Department of Law')),
+    (Ghost, CompactGhost, ('The Mocking Knight', 1401, 'male', 1492)),
+    (Pupil, CompactPupil, ('Luke Bery', 2008, 'male', 2020, ('Cotton', 'owl'))),
+]
+
+
+def bytes_per_instance(cls, args, n):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    members = [cls(*args) for _ in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del members
+    return (after - before) / n
+
+
+def instances_per_second(cls, args, n):
+    gc.collect()
+    start = time.perf_counter()
+    members = [cls(*args) for _ in range(n)]
+    elapsed = time.perf_counter() - start
+    del members
+    return n / elapsed
+
+
+def main(sizes):
+    print(f"{'class':<28}{'members':>12}{'bytes/member':>16}{'members/s':>16}")
+    for regular, compact, args in CLASSES:
+        for n in sizes:
+            for cls in (regular, compact):
+                memory = bytes_per_instance(cls, args, n)
+                speed = instances_per_second(cls, args, n)
+                print(f"{cls.__name__:<28}{n:>12,}{memory:>16.1f}{speed:>16,.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**4, 10**5, 10**6, 10**7])
+    main(parser.parse_args().sizes)
@@ -0,0 +1,49 @@
+""" Compares shopping_list() with the Counter loop from code_per_day/day_34.py
+
+Usage: python benchmarks/shopping_list.py [--occurrences 10000000] [--ingredients 100]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from magical_universe import Potion
+from shopping import shopping_list
+
+
+def counter_loop(potions) -> Counter:
+    result = Counter()
+    for potion in potions:
+        for ingredient in potion:
+            result[ingredient] += 1
+    return result
+
+
+def main(occurrences, ingredients, recipe_length=8):
+    rng = random.Random(0)
+    names = [f"ingredient {number}" for number in range(ingredients)]
+    potions = [Potion(rng.choices(names, k=recipe_length)) for _ in range(occurrences // recipe_length)]
+
+    timings = {}
+    for function in (counter_loop, shopping_list):
+        start = time.perf_counter()
+        result = function(potions)
+        timings[function.__name__] = time.perf_counter() - start
+
+    assert result == counter_loop(potions)
+    for name, seconds in timings.items():
+        print(f"{name:<16}{seconds:>8.2f}s")
+    print(f"speed-up: {timings['counter_loop'] / timings['shopping_list']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--occurrences', type=int, default=10**7)
+    parser.add_argument('--ingredients', type=int, default=100)
+    arguments = parser.parse_args()
+    main(arguments.occurrences, arguments.ingredients)
@@ -0,0 +1,135 @@
+from collections import Counter
+from typing import NamedTuple
+
+from magical_universe import Potion, ingredient_table
+
+
+class BrewPlan(NamedTuple):
+    """ Which potions to brew how often, and what is left in stock afterwards """
+    brews: dict
+    value: float
+    leftover: Counter
+
+    @property
+    def potions(self) -> int:
+        return sum(self.brews.values())
+
+
+class _Planner:
+    """ Works on plain lists indexed by recipe rank and dicts keyed by ingredient id """
+    def __init__(self, stock: dict, needs: list, values: list):
+        self.stock = stock
+        self.needs = needs
+        self.values = values
+        self.counts = [0] * len(needs)
+        self.value = 0
+        self._users = {}
+        for rank, recipe_needs in enumerate(needs):
+            for ingredient_id, _ in recipe_needs:
+                self._users.setdefault(ingredient_id, []).append(rank)
+        self._neighbours = {}
+
+    def brewable(self, rank: int) -> int:
+        stock = self.stock
+        return min(stock[ingredient_id] // amount for ingredient_id, amount in self.needs[rank])
+
+    def brew(self, rank: int, times: int):
+        stock = self.stock
+        for ingredient_id, amount in self.needs[rank]:
+            stock[ingredient_id] -= times * amount
+        self.counts[rank] += times
+        self.value += times * self.values[rank]
+
+    def fill(self, ranks, log: list = None):
+        """ Brews every recipe in ranks as often as the stock allows, best recipes first """
+        stock, needs = self.stock, self.needs
+        for rank in ranks:
+            # Most recipes lack some ingredient, so bail out at the first one
+            for ingredient_id, amount in needs[rank]:
+                if stock[ingredient_id] < amount:
+                    break
+            else:
+                times = self.brewable(rank)
+                self.brew(rank, times)
+                if log is not None:
+                    log.append((rank, times))
+
+    def neighbours(self, rank: int) -> list:
+        """ Returns the recipes sharing an ingredient with the recipe at rank, best first """
+        found = self._neighbours.get(rank)
+        if found is None:
+            found = set()
+            for ingredient_id, _ in self.needs[rank]:
+                found.update(self._users[ingredient_id])
+            found.discard(rank)
+            found = self._neighbours[rank] = sorted(found)
+        return found
+
+    def improve(self, rounds: int):
+        """ Local search: brews one potion less if the freed ingredients are worth more elsewhere
+
+        Only recipes sharing an ingredient with the dropped one can use the
+        freed stock, so only those are refilled.
+        """
+        for _ in range(rounds):
+            improved = False
+            for rank in reversed(range(len(self.counts))):
+                if not self.counts[rank]:
+                    continue
+                value_before = self.value
+                self.brew(rank, -1)
+                log = []
+                self.fill(self.neighbours(rank), log)
+                if self.value > value_before:
+                    improved = True
+                    continue
+                # Not worth it: undo the move
+                for other, times in log:
+                    self.brew(other, -times)
+                self.brew(rank, 1)
+            if not improved:
+                break
+
+
+def plan_brewing(inventory, recipes, values=None, rounds: int = 10) -> BrewPlan:
+    """ Decides how often to brew each recipe to get the most out of the inventory
+
+    inventory maps ingredient names to the amount in stock, values maps
+    potions to what a single brew is worth (every brew counts 1 by default).
+    Recipes are first brewed greedily, the most valuable per scarce
+    ingredient first, then the plan is improved by local search for at most
+    the given number of rounds. The plan never uses more than is in stock,
+    but isn't guaranteed to be optimal.
+    """
+    stock = {}
+    for ingredient, amount in inventory.items():
+        ingredient_id = ingredient_table.lookup(ingredient)
+        if ingredient_id is not None and amount > 0:
+            stock[ingredient_id] = amount
+
+    candidates = []
+    for potion in dict.fromkeys(recipes):
+        if not isinstance(potion, Potion):
+            raise TypeError(f"Only potions can be brewed, not {potion!r}")
+        value = 1 if values is None else values.get(potion, 0)
+        # Scarce ingredients first, they are the likeliest to run out
+        recipe_needs = tuple(sorted(Counter(potion._ids).items(), key=lambda need: stock.get(need[0], 0) / need[1]))
+        if value <= 0 or not recipe_needs:
+            continue
+        if any(stock.get(ingredient_id, 0) < amount for ingredient_id, amount in recipe_needs):
+            continue
+        # How much of the whole stock a single brew uses up, scarce ingredients weigh more
+        cost = sum(amount / stock[ingredient_id] for ingredient_id, amount in recipe_needs)
+        candidates.append((value / cost, potion, recipe_needs, value))
+
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+    planner = _Planner(stock, [candidate[2] for candidate in candidates], [candidate[3] for candidate in candidates])
+    planner.fill(range(len(candidates)))
+    planner.improve(rounds)
+
+    brews = {candidate[1]: times for candidate, times in zip(candidates, planner.counts) if times}
+    leftover = Counter({ingredient: amount for ingredient, amount in inventory.items() if amount > 0})
+    for ingredient_id, amount in stock.items():
+        leftover[ingredient_table.names[ingredient_id]] = amount
+    leftover += Counter()
+    return BrewPlan(brews, planner.value, leftover)
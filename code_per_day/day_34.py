@@ -1,5 +1,5 @@
-from collections import Counter
 from magical_universe import Potion
+from shopping import shopping_list
 
 # Step 1: Create the potions
 flask_of_remembrance = Potion(['raven eggshells', 'tincture of thyme', 'unicorn tears',
@@ -18,11 +18,4 @@ brew_of_lies = Potion(['horned flies', 'leeches', 'drakus flower', 'horned flies
 all_potions = [flask_of_remembrance, vial_of_anger, ancient_wisdom, brew_of_lies]
 
 # Step 3: Create the shopping list!
-shopping_list = Counter()
-
-for potion in all_potions:
-    for ingredient in potion:
-        shopping_list[ingredient] += 1
-
-print(f"Final shopping list: {shopping_list}")
-
+print(f"Final shopping list: {shopping_list(all_potions)}")
@@ -0,0 +1,187 @@
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from typing import NamedTuple
+
+from magical_universe import (DarkArmyMember, Pupil, Charm, Transfiguration, Hex, Curse, CounterSpell, HealingSpell,
+                              SpellOutcome, counter_spells)
+
+# Damage dealt (or health restored) by a spell of the given difficulty
+POWER = {'Simple': 10, 'Medium': 20, 'Difficult': 30}
+
+DRAW, FIRST, SECOND = 0, 1, 2
+
+
+class Duelist(NamedTuple):
+    """ Someone taking part in a duel and the spells they can use """
+    name: str
+    spells: tuple
+    health: int = 100
+
+    @classmethod
+    def from_pupil(cls, pupil: Pupil, health: int = 100) -> 'Duelist':
+        """ A pupil duels with every known spell they are allowed to cast """
+        spells = [spell for spell in pupil.known_spells if pupil.try_cast_spell(spell) is SpellOutcome.CAST]
+        return cls(pupil.name, _in_stable_order(spells), health)
+
+    @classmethod
+    def from_dark_army_member(cls, member: DarkArmyMember, spells=None, health: int = 100) -> 'Duelist':
+        if spells is None:
+            spells = (Hex.rectaro(), Hex.immolim(), Curse.fiera_satanotis())
+        return cls(member.name, _in_stable_order(spells), health)
+
+
+def _in_stable_order(spells) -> tuple:
+    # Sets of spells iterate in a different order in every process, which would
+    # make duels with the same seed play out differently
+    return tuple(sorted(spells, key=lambda spell: (spell.__class__.__name__, spell.name, spell.incantation)))
+
+
+class DuelStats(NamedTuple):
+    """ Outcome counts of many duels """
+    first_wins: int = 0
+    second_wins: int = 0
+    draws: int = 0
+
+    @property
+    def duels(self) -> int:
+        return self.first_wins + self.second_wins + self.draws
+
+    @property
+    def first_win_rate(self) -> float:
+        return self.first_wins / self.duels if self.duels else 0.0
+
+    @property
+    def second_win_rate(self) -> float:
+        return self.second_wins / self.duels if self.duels else 0.0
+
+    def merge(self, other: 'DuelStats') -> 'DuelStats':
+        return DuelStats(*(mine + theirs for mine, theirs in zip(self, other)))
+
+
+def _neutralising_pairs(first: Duelist, second: Duelist) -> frozenset:
+    """ Returns the (counter-spell, spell) pairs that matter in a duel between first and second """
+    spells = set(first.spells) | set(second.spells)
+    return frozenset((counter_spell, spell)
+                     for counter_spell in spells if isinstance(counter_spell, CounterSpell)
+                     for spell in counter_spells.neutralised_by(counter_spell) if spell in spells)
+
+
+def _moves(duelist: Duelist, opponent: Duelist, neutralising: frozenset) -> list:
+    """ Turns every spell of duelist into a (damage, healing, blocked) move
+
+    blocked holds the positions of the opponent's spells that this spell neutralises.
+    """
+    moves = []
+    for spell in duelist.spells:
+        power = POWER.get(spell.difficulty, 0)
+        healing = power if isinstance(spell, HealingSpell) else 0
+        damage = 0 if healing or isinstance(spell, CounterSpell) else power
+        blocked = frozenset(position for position, opponent_spell in enumerate(opponent.spells)
+                            if (spell, opponent_spell) in neutralising)
+        moves.append((damage, healing, blocked))
+    return moves
+
+
+# The only move of a duelist without any spells
+_IDLE = [(0, 0, frozenset())]
+
+
+def _play(first_moves: list, second_moves: list, first_health: int, second_health: int,
+          rng: random.Random, max_rounds: int) -> int:
+    health_1, health_2 = first_health, second_health
+    randrange = rng.randrange
+    first_count, second_count = len(first_moves), len(second_moves)
+    first_moves, second_moves = first_moves or _IDLE, second_moves or _IDLE
+
+    for _ in range(max_rounds):
+        move_1 = randrange(first_count) if first_count else 0
+        move_2 = randrange(second_count) if second_count else 0
+        damage_1, healing_1, blocks_1 = first_moves[move_1]
+        damage_2, healing_2, blocks_2 = second_moves[move_2]
+
+        if move_1 not in blocks_2:
+            health_2 -= damage_1
+            health_1 = min(health_1 + healing_1, first_health)
+        if move_2 not in blocks_1:
+            health_1 -= damage_2
+            health_2 = min(health_2 + healing_2, second_health)
+
+        if health_1 <= 0:
+            return DRAW if health_2 <= 0 else SECOND
+        if health_2 <= 0:
+            return FIRST
+
+    return DRAW
+
+
+def duel(first: Duelist, second: Duelist, rng: random.Random, max_rounds: int = 50) -> int:
+    """ Plays a single duel and returns FIRST, SECOND or DRAW
+
+    In every round both duelists cast a random spell at the same time.
+    Healing spells restore health, counter-spells neutralise the spell cast
+    against them if they counter it, and any other spell deals damage
+    according to its difficulty.
+    """
+    neutralising = _neutralising_pairs(first, second)
+    return _play(_moves(first, second, neutralising), _moves(second, first, neutralising),
+                 first.health, second.health, rng, max_rounds)
+
+
+def _simulate_chunk(first: Duelist, second: Duelist, neutralising: frozenset, seed: int, chunk: int,
+                    duels: int, max_rounds: int) -> DuelStats:
+    # Every chunk has its own seed, so results don't depend on how chunks are spread over workers
+    rng = random.Random(f"{seed}:{chunk}")
+    first_moves = _moves(first, second, neutralising)
+    second_moves = _moves(second, first, neutralising)
+
+    outcomes = [0, 0, 0]
+    for _ in range(duels):
+        outcomes[_play(first_moves, second_moves, first.health, second.health, rng, max_rounds)] += 1
+    return DuelStats(outcomes[FIRST], outcomes[SECOND], outcomes[DRAW])
+
+
+def simulate(first: Duelist, second: Duelist, duels: int, seed: int = 0, workers: int = None,
+             chunk_size: int = 10_000, max_rounds: int = 50) -> DuelStats:
+    """ Plays many seeded duels, spread over a pool of worker processes
+
+    The same seed and chunk_size always give the same statistics, whatever
+    the number of workers. workers=1 plays all duels in this process.
+    """
+    chunks = [min(chunk_size, duels - start) for start in range(0, duels, chunk_size)]
+    neutralising = _neutralising_pairs(first, second)
+    arguments = (
+        [first] * len(chunks),
+        [second] * len(chunks),
+        [neutralising] * len(chunks),
+        [seed] * len(chunks),
+        range(len(chunks)),
+        chunks,
+        [max_rounds] * len(chunks),
+    )
+
+    if workers == 1:
+        results = map(_simulate_chunk, *arguments)
+        return reduce(DuelStats.merge, results, DuelStats())
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return reduce(DuelStats.merge, executor.map(_simulate_chunk, *arguments), DuelStats())
+
+
+if __name__ == "__main__":
+    import time
+
+    lissy = Pupil.lissy()
+    lissy.add_trait('highly intelligent')
+    lissy.learn_spells([Charm.liberula(), Transfiguration.alteraror_canieo(), CounterSpell.mufindo_immolim(),
+                        HealingSpell.porim_perfite()])
+
+    start = time.perf_counter()
+    stats = simulate(Duelist.from_pupil(lissy),
+                     Duelist.from_dark_army_member(DarkArmyMember('Keres Fulford', 1953)),
+                     duels=1_000_000, seed=42)
+    elapsed = time.perf_counter() - start
+
+    print(f"{stats.duels:,} duels in {elapsed:.1f}s ({stats.duels / elapsed:,.0f} duels/s)")
+    print(f"Lissy wins {stats.first_win_rate:.1%}, Keres wins {stats.second_win_rate:.1%}")
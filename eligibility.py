@@ -0,0 +1,178 @@
+import bisect
+import itertools
+
+from typing import NamedTuple
+
+from magical_universe import Spell, Hex, SpellOutcome, current_academic_year, learning_outcome
+
+
+def bitset(indices, size: int) -> int:
+    """ Returns an integer in which exactly the bits at the given indices are set """
+    bits = bytearray((size + 7) // 8)
+    for index in indices:
+        bits[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def members_of(bits: int, items: list) -> list:
+    """ Returns the items whose positions are set in bits """
+    return list(itertools.compress(items, map('1'.__eq__, bin(bits)[:1:-1])))
+
+
+class EligibilityMatrix:
+    """ Decides for N pupils and M spells at once which pupil may learn which spell
+
+    Each spell's row is a bitset over the pupils, computed with a handful of
+    big-integer operations from per-trait and per-start-year bitsets instead
+    of one learn_spell call per pair. Rows are cached until a pupil's traits
+    are updated or the academic year changes.
+    """
+    def __init__(self, pupils, spells):
+        self.pupils = list(pupils)
+        self.spells = list(spells)
+        self._positions = {pupil: position for position, pupil in enumerate(self.pupils)}
+
+        size = len(self.pupils)
+        self._intelligent = bitset((position for position, pupil in enumerate(self.pupils)
+                                    if pupil.exhibits_trait('highly intelligent')), size)
+        self._evil = bitset((position for position, pupil in enumerate(self.pupils)
+                             if pupil.exhibits_trait('evil')), size)
+        self._index_start_years()
+
+        self._rows = {}
+        self._rows_year = None
+
+    def _index_start_years(self):
+        """ Builds one bitset per start year holding every pupil who started in or before it """
+        self._recorded_start_years = [pupil.start_year for pupil in self.pupils]
+        by_start_year = {}
+        for position, pupil in enumerate(self.pupils):
+            by_start_year.setdefault(pupil.start_year, []).append(position)
+
+        self._start_years = sorted(by_start_year)
+        self._started_by = []
+        bits = bytearray((len(self.pupils) + 7) // 8)
+        for start_year in self._start_years:
+            for position in by_start_year[start_year]:
+                bits[position >> 3] |= 1 << (position & 7)
+            self._started_by.append(int.from_bytes(bits, 'little'))
+
+    def _in_year_at_least(self, year: int, now: int) -> int:
+        """ Returns the pupils whose current_year is at least year """
+        latest_start_year = now + 1 - year
+        position = bisect.bisect_right(self._start_years, latest_start_year)
+        return self._started_by[position - 1] if position else 0
+
+    def _compute_row(self, spell: Spell, now: int) -> int:
+        rule = learning_outcome.dispatch(type(spell))
+        year_rule = learning_outcome.dispatch(Spell)
+        dark_magic_rule = learning_outcome.dispatch(Hex)
+
+        if rule is dark_magic_rule and spell.min_year is None:
+            return self._evil
+
+        if rule is year_rule or rule is dark_magic_rule:
+            if spell.min_year is None:
+                return 0
+            return self._in_year_at_least(spell.min_year, now) | self._intelligent
+
+        # A rule registered elsewhere: ask it about every pupil
+        return bitset((position for position, pupil in enumerate(self.pupils)
+                       if rule(spell, pupil) is SpellOutcome.LEARNED), len(self.pupils))
+
+    def row(self, spell: Spell) -> int:
+        """ Returns the bitset of pupils that may learn spell """
+        now = current_academic_year()
+        if now != self._rows_year:
+            self._rows = {}
+            self._rows_year = now
+
+        row = self._rows.get(spell)
+        if row is None:
+            row = self._rows[spell] = self._compute_row(spell, now)
+        return row
+
+    def rows(self) -> list:
+        """ Returns the rows of all spells, in the order of self.spells """
+        return [self.row(spell) for spell in self.spells]
+
+    def is_eligible(self, pupil, spell: Spell) -> bool:
+        return bool(self.row(spell) >> self._positions[pupil] & 1)
+
+    def pupils_for(self, spell: Spell) -> list:
+        return members_of(self.row(spell), self.pupils)
+
+    def spells_for(self, pupil) -> list:
+        position = self._positions[pupil]
+        return [spell for spell in self.spells if self.row(spell) >> position & 1]
+
+    def count(self, spell: Spell) -> int:
+        return bin(self.row(spell)).count('1')
+
+    def update_pupil(self, pupil):
+        """ Picks up changed traits or a changed start year of a single pupil """
+        position = self._positions[pupil]
+        bit = 1 << position
+        intelligent = bit if pupil.exhibits_trait('highly intelligent') else 0
+        evil = bit if pupil.exhibits_trait('evil') else 0
+
+        changed = False
+        if self._intelligent & bit != intelligent:
+            self._intelligent ^= bit
+            changed = True
+        if self._evil & bit != evil:
+            self._evil ^= bit
+            changed = True
+        if pupil.start_year != self._recorded_start_years[position]:
+            self._index_start_years()
+            changed = True
+
+        if changed:
+            self._rows = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self.pupils)} pupils x {len(self.spells)} spells)"
+
+
+class Enrollment(NamedTuple):
+    """ Summary of an enrollment: which pupils learned which spells """
+    pupils: list
+    spells: list
+    rows: list
+
+    def learned(self, spell: Spell) -> list:
+        return members_of(self.rows[self.spells.index(spell)], self.pupils)
+
+    def rejected(self, spell: Spell) -> list:
+        row = self.rows[self.spells.index(spell)]
+        everyone = (1 << len(self.pupils)) - 1
+        return members_of(everyone & ~row, self.pupils)
+
+    def counts(self) -> dict:
+        """ Returns how many pupils learned each spell """
+        return {spell: bin(row).count('1') for spell, row in zip(self.spells, self.rows)}
+
+
+def enroll(pupils, spells, matrix: EligibilityMatrix = None) -> Enrollment:
+    """ Teaches every pupil all of the given spells they are eligible for
+
+    The eligibility of all pairs is decided in one pass by an
+    EligibilityMatrix; pass one built for the same pupils and spells to
+    reuse its cached rows.
+    """
+    if matrix is None:
+        matrix = EligibilityMatrix(pupils, spells)
+    elif list(pupils) != matrix.pupils or list(spells) != matrix.spells:
+        raise ValueError("The matrix was built for other pupils or spells than the ones to enroll")
+
+    rows = matrix.rows()
+    learned = [[] for _ in matrix.pupils]
+    for spell, row in zip(matrix.spells, rows):
+        for spells_of_pupil in members_of(row, learned):
+            spells_of_pupil.append(spell)
+
+    for pupil, spells_of_pupil in zip(matrix.pupils, learned):
+        if spells_of_pupil:
+            pupil.known_spells.update(spells_of_pupil)
+
+    return Enrollment(matrix.pupils, matrix.spells, rows)
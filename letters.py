@@ -0,0 +1,280 @@
+import mmap
+import os
+import struct
+
+from array import array
+from typing import NamedTuple
+
+from magical_universe import Letter
+
+# Every archive starts with these bytes, the last ones hold the format version
+MAGIC = b'CKLA\x01\x00\x00\x00'
+
+# Every letter starts with the lengths of the encoded recipient and content
+HEADER = struct.Struct('<II')
+
+
+class ArchivedLetter(NamedTuple):
+    recipient: str
+    content: str
+
+
+class LetterArchive:
+    """ Creates an append-only archive that keeps many letters in a single file
+
+    Letters are buffered and written in groups with a single write call once
+    batch_size letters or batch_bytes bytes are pending, and on flush() and
+    close(). With sync=True every group is also fsynced. An in-memory index
+    maps letter numbers to their offsets in the file and recipients to their
+    letters; it is rebuilt from the letter headers when an archive is
+    reopened. A letter cut short by a crash at the end of the file is
+    dropped.
+    """
+    def __init__(self, path: str, batch_size: int = 1000, batch_bytes: int = 1 << 20, sync: bool = False):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.sync = sync
+
+        self._offsets = array('Q')
+        self._by_recipient = {}
+        self._pending = bytearray()
+        self._pending_letters = 0
+
+        # In append mode every write goes to the end, whatever was read before
+        self._file = open(path, 'a+b')
+        self._size = self._load()
+
+    def _load(self) -> int:
+        """ Checks the archive, indexes its letters and returns the size of the valid part """
+        archive = self._file
+        size = archive.seek(0, os.SEEK_END)
+        if size == 0:
+            archive.write(MAGIC)
+            archive.flush()
+            return len(MAGIC)
+
+        archive.seek(0)
+        if archive.read(len(MAGIC)) != MAGIC:
+            archive.close()
+            raise ValueError(f"'{self.path}' is not a letter archive")
+
+        offset = len(MAGIC)
+        while offset + HEADER.size <= size:
+            recipient_length, content_length = HEADER.unpack(archive.read(HEADER.size))
+            end = offset + HEADER.size + recipient_length + content_length
+            if end > size:
+                break
+            recipient = archive.read(recipient_length).decode('utf-8')
+            self._index(offset, recipient)
+            archive.seek(end)
+            offset = end
+
+        if offset != size:
+            archive.truncate(offset)
+        return offset
+
+    def _index(self, offset: int, recipient: str):
+        self._by_recipient.setdefault(recipient, []).append(len(self._offsets))
+        self._offsets.append(offset)
+
+    def append(self, recipient: str, content: str, count: bool = True) -> int:
+        """ Adds a letter to the archive and returns its number
+
+        The letter is counted in Letter.total_number_of_letters unless count
+        is False, which is meant for letters that were already counted when
+        they were accepted elsewhere (like by an OwlPost).
+        """
+        if self._file.closed:
+            raise ValueError("Cannot add letters to a closed archive")
+        encoded_recipient = recipient.encode('utf-8')
+        encoded_content = content.encode('utf-8')
+
+        self._index(self._size + len(self._pending), recipient)
+        self._pending += HEADER.pack(len(encoded_recipient), len(encoded_content))
+        self._pending += encoded_recipient
+        self._pending += encoded_content
+        self._pending_letters += 1
+
+        if count:
+            Letter.total_number_of_letters += 1
+
+        if self._pending_letters >= self.batch_size or len(self._pending) >= self.batch_bytes:
+            self.flush()
+        return len(self._offsets) - 1
+
+    def flush(self):
+        """ Writes all pending letters to the archive file """
+        if self._pending:
+            self._file.write(self._pending)
+            self._size += len(self._pending)
+            self._pending = bytearray()
+            self._pending_letters = 0
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def offsets(self) -> array:
+        """ The offset of every letter in the archive file """
+        return array('Q', self._offsets)
+
+    def __getitem__(self, number: int) -> ArchivedLetter:
+        offset = self._offsets[number]
+        if offset >= self._size:
+            self.flush()
+        self._file.seek(offset)
+        recipient_length, content_length = HEADER.unpack(self._file.read(HEADER.size))
+        recipient = self._file.read(recipient_length).decode('utf-8')
+        content = self._file.read(content_length).decode('utf-8')
+        return ArchivedLetter(recipient, content)
+
+    def letters_to(self, recipient: str) -> list:
+        """ Returns the contents of all letters to recipient, oldest first """
+        return [self[number].content for number in self._by_recipient.get(recipient, ())]
+
+    def recipients(self) -> list:
+        return list(self._by_recipient)
+
+    def __iter__(self):
+        return (self[number] for number in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}('{self.path}', {len(self)} letters)"
+
+
+class LetterArchiveReader:
+    """ Reads a letter archive through a memory map
+
+    Only the letter headers are read to build the index, the letters
+    themselves stay in the page cache until they are asked for. view() and
+    views_to() return memoryviews into the map without copying anything;
+    they have to be released before the reader is closed. refresh() picks up
+    letters appended to the archive after the reader was opened.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = None
+        self._view = memoryview(b'')
+        self._offsets = array('Q')
+        # Keyed by the encoded recipient, so scanning doesn't decode every name
+        self._by_recipient = {}
+        self._end = len(MAGIC)
+        try:
+            self.refresh()
+        except ValueError:
+            self.close()
+            raise
+
+    def refresh(self):
+        """ Maps the archive again and indexes the letters added since the last refresh """
+        size = os.fstat(self._file.fileno()).st_size
+        if self._map is not None and size == len(self._map):
+            return
+        if size < len(MAGIC):
+            raise ValueError(f"'{self.path}' is not a letter archive")
+
+        old_map = self._map
+        self._view.release()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        if old_map is not None:
+            try:
+                old_map.close()
+            except BufferError:
+                # Someone still holds a view into it, it is closed once they let go
+                pass
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"'{self.path}' is not a letter archive")
+
+        unpack_from, header_size = HEADER.unpack_from, HEADER.size
+        offsets, by_recipient, archive = self._offsets, self._by_recipient, self._map
+        offset = self._end
+        # A letter that is only partly written yet is picked up by the next refresh
+        while offset + header_size <= size:
+            recipient_length, content_length = unpack_from(archive, offset)
+            end = offset + header_size + recipient_length + content_length
+            if end > size:
+                break
+            recipient = archive[offset + header_size:offset + header_size + recipient_length]
+            numbers = by_recipient.get(recipient)
+            if numbers is None:
+                numbers = by_recipient[recipient] = array('I')
+            numbers.append(len(offsets))
+            offsets.append(offset)
+            offset = end
+        self._end = offset
+
+    def _bounds(self, number: int) -> tuple:
+        offset = self._offsets[number]
+        recipient_length, content_length = HEADER.unpack_from(self._map, offset)
+        start = offset + HEADER.size + recipient_length
+        return offset + HEADER.size, start, start + content_length
+
+    def view(self, number: int) -> memoryview:
+        """ Returns the encoded content of letter number without copying it """
+        _, start, end = self._bounds(number)
+        return self._view[start:end]
+
+    def content(self, number: int) -> str:
+        _, start, end = self._bounds(number)
+        return str(self._view[start:end], 'utf-8')
+
+    def __getitem__(self, number: int) -> ArchivedLetter:
+        recipient_start, start, end = self._bounds(number)
+        view = self._view
+        return ArchivedLetter(str(view[recipient_start:start], 'utf-8'), str(view[start:end], 'utf-8'))
+
+    def _numbers(self, recipient: str):
+        return self._by_recipient.get(recipient.encode('utf-8'), ())
+
+    def views_to(self, recipient: str) -> list:
+        """ Returns the encoded contents of all letters to recipient without copying them """
+        return [self.view(number) for number in self._numbers(recipient)]
+
+    def letters_to(self, recipient: str):
+        """ Yields the contents of all letters to recipient, decoding one at a time """
+        return (self.content(number) for number in self._numbers(recipient))
+
+    def count_to(self, recipient: str) -> int:
+        return len(self._numbers(recipient))
+
+    def recipients(self) -> list:
+        return [recipient.decode('utf-8') for recipient in self._by_recipient]
+
+    def __iter__(self):
+        return (self[number] for number in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def close(self):
+        self._view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}('{self.path}', {len(self)} letters)"
@@ -1,10 +1,123 @@
+import io
+import sys
+import time
 import datetime
 import functools
+import operator
+import inspect
+import weakref
+import contextlib
 
+from array import array
+from enum import Enum
 from typing import NamedTuple
-from abc import ABC, abstractmethod
+from abc import ABC, ABCMeta, abstractmethod
 from dataclasses import dataclass
-from collections import defaultdict
+from collections.abc import Mapping, Sequence
+
+class AcademicClock:
+    """ Tells the current year to everything in the magical universe
+
+    The year is read from the wall clock at most once per ttl seconds (or
+    only on refresh() if ttl is None) and can be moved forward with advance()
+    or pinned with frozen() for simulations and batch jobs.
+    """
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._offset = 0
+        self._frozen_year = None
+        self._cached_year = None
+        self._expires_at = 0.0
+
+    @property
+    def year(self) -> int:
+        if self._frozen_year is not None:
+            return self._frozen_year
+
+        if self._cached_year is None or (self.ttl is not None and time.monotonic() >= self._expires_at):
+            self.refresh()
+        return self._cached_year + self._offset
+
+    def refresh(self):
+        """ Reads the wall clock again """
+        self._cached_year = datetime.datetime.now().year
+        if self.ttl is not None:
+            self._expires_at = time.monotonic() + self.ttl
+
+    def advance(self, years: int = 1):
+        """ Moves the academic year forward by the given number of years """
+        if self._frozen_year is not None:
+            self._frozen_year += years
+        else:
+            self._offset += years
+
+    @contextlib.contextmanager
+    def frozen(self, year: int = None):
+        """ Pins the academic year (by default to the current one) inside a with block """
+        previous = self._frozen_year
+        self._frozen_year = self.year if year is None else year
+        try:
+            yield self
+        finally:
+            self._frozen_year = previous
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(ttl={self.ttl}, year={self.year})"
+
+
+academic_clock = AcademicClock()
+
+
+def use_clock(clock) -> AcademicClock:
+    """ Makes the whole module consult another clock and returns the previous one
+
+    Any object with a year attribute will do.
+    """
+    global academic_clock
+    previous, academic_clock = academic_clock, clock
+    return previous
+
+
+def current_academic_year() -> int:
+    return academic_clock.year
+
+
+class TraitRegistry:
+    """ Assigns every character trait a bit position shared by all members """
+    def __init__(self):
+        self._bits = {}
+        self._names = []
+
+    def bit(self, trait: str) -> int:
+        """ Returns the bit of a trait, registering the trait if it is new """
+        bit = self._bits.get(trait)
+        if bit is None:
+            bit = self._bits[trait] = 1 << len(self._names)
+            self._names.append(trait)
+        return bit
+
+    def lookup(self, trait: str) -> int:
+        """ Returns the bit of a trait or 0 for traits nobody has yet """
+        return self._bits.get(trait, 0)
+
+    def name(self, bit: int) -> str:
+        return self._names[bit.bit_length() - 1]
+
+    def names(self, mask: int) -> list:
+        """ Returns the traits whose bits are set in mask, in registration order """
+        names = []
+        while mask:
+            lowest_bit = mask & -mask
+            names.append(self._names[lowest_bit.bit_length() - 1])
+            mask ^= lowest_bit
+        return names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+trait_registry = TraitRegistry()
+
 
 class CastleKilmereMember:
     """Creates a member of the Castle Kilmere School of Magic"""
@@ -12,12 +125,23 @@ class CastleKilmereMember:
         self.name = name
         self.birthyear = birthyear
         self.sex = sex
-        self._traits = defaultdict(lambda: False)
-
-    def write_letter(self, recipient, content):
+        # Bitsets over trait_registry of traits the member does and doesn't exhibit
+        self._true_traits = 0
+        self._false_traits = 0
+        # Trait bits in the order they were first added to this member
+        self._trait_order = ()
+
+    def write_letter(self, recipient, content, archive=None):
+        """ Writes a letter to its own file, or appends it to archive if given
+
+        archive can be a letters.LetterArchive or an owl_post.OwlPost; what its
+        append() returned (the letter number or a future) is returned.
+        """
         letter_name = f"dear_{recipient}.txt"
-        with Letter(letter_name) as l:
+        letter = Letter(letter_name, archive, recipient)
+        with letter as l:
             l.write(content)
+        return letter.receipt
 
     def whisper(function):
         @functools.wraps(function)
@@ -35,11 +159,23 @@ class CastleKilmereMember:
         return f"{self.name} says: {words}"
 
     def add_trait(self, trait, value=True):
-        self._traits[trait] = value
+        bit = trait_registry.bit(trait)
+        if not (self._true_traits | self._false_traits) & bit:
+            self._trait_order += (bit,)
+        if value:
+            self._true_traits |= bit
+            self._false_traits &= ~bit
+        else:
+            self._false_traits |= bit
+            self._true_traits &= ~bit
+
+    @property
+    def _traits(self) -> dict:
+        return {trait_registry.name(bit): bool(self._true_traits & bit) for bit in self._trait_order}
 
     def print_traits(self):
-        true_traits = [trait for trait, value in self._traits.items() if value]
-        false_traits = [trait for trait, value in self._traits.items() if not value]
+        true_traits = [trait_registry.name(bit) for bit in self._trait_order if self._true_traits & bit]
+        false_traits = [trait_registry.name(bit) for bit in self._trait_order if self._false_traits & bit]
 
         if true_traits:
             print(f"{self.name} is {', '.join(true_traits)}.")
@@ -49,12 +185,11 @@ class CastleKilmereMember:
             print(f"{self.name} does not have traits yet.")
 
     def exhibits_trait(self, trait: str) -> bool:
-        value = self._traits[trait]
-        return value
+        return bool(self._true_traits & trait_registry.lookup(trait))
 
     @property
     def age(self) -> int:
-        now = datetime.datetime.now().year
+        now = academic_clock.year
         return now - self.birthyear
 
     @classmethod
@@ -101,7 +236,7 @@ class Ghost(CastleKilmereMember):
 
     @property
     def age(self) -> int:
-        now = datetime.datetime.now().year
+        now = academic_clock.year
         return now - self.birthyear
 
     def __repr__(self) -> str:
@@ -130,6 +265,60 @@ class Ghost(CastleKilmereMember):
         return cls("The Boneless Bard", 1211, 'male', 1288)
 
 
+# Shared table of ELM subjects. Each pupil stores its ELMs as a single
+# integer in which bit i is set if the pupil holds ELM_SUBJECTS[i]
+ELM_SUBJECTS = tuple(sys.intern(subject) for subject in (
+                  'Critical Thinking',
+                  'Self-Defense Against Fresh Fruit',
+                  'Broomstick Flying',
+                  'Magical Theory',
+                  'Foreign Magical Systems',
+                  'Charms',
+                  'Defence Against Dark Magic',
+                  'History of Magic',
+                  'Potions',
+                  'Transfiguration'))
+
+_ELM_BITS = {subject: 1 << position for position, subject in enumerate(ELM_SUBJECTS)}
+
+
+def elm_mask(*subjects: str) -> int:
+    """ Returns the bitmask that holds exactly the given ELM subjects """
+    mask = 0
+    for subject in subjects:
+        try:
+            mask |= _ELM_BITS[subject]
+        except KeyError:
+            raise ValueError(f"'{subject}' is not an ELM subject") from None
+    return mask
+
+
+def pupils_with_elms(pupils, *subjects: str) -> list:
+    """ Returns all pupils that hold every one of the given ELMs """
+    required = elm_mask(*subjects)
+    return [pupil for pupil in pupils if pupil._elm_mask & required == required]
+
+
+class ElmsView(Mapping):
+    """ A read-only mapping from each ELM subject to whether a pupil holds it """
+    __slots__ = ('_pupil',)
+
+    def __init__(self, pupil: 'Pupil'):
+        self._pupil = pupil
+
+    def __getitem__(self, subject: str) -> bool:
+        return bool(self._pupil._elm_mask & _ELM_BITS[subject])
+
+    def __iter__(self):
+        return iter(ELM_SUBJECTS)
+
+    def __len__(self) -> int:
+        return len(ELM_SUBJECTS)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self)})"
+
+
 class Pupil(CastleKilmereMember):
     """ Create a Castle Kilmere Pupil """
 
@@ -141,17 +330,7 @@ class Pupil(CastleKilmereMember):
         if pet is not None:
             self.pet_name, self.pet_type = pet
 
-        self._elms = {
-                  'Critical Thinking': False,
-                  'Self-Defense Against Fresh Fruit': False,
-                  'Broomstick Flying': False,
-                  'Magical Theory': False,
-                  'Foreign Magical Systems': False,
-                  'Charms': False,
-                  'Defence Against Dark Magic': False,
-                  'History of Magic': False,
-                  'Potions': False,
-                  'Transfiguration': False}
+        self._elm_mask = 0
 
         self._friends = []
 
@@ -169,11 +348,17 @@ class Pupil(CastleKilmereMember):
 
     @property
     def current_year(self) -> int:
-        now = datetime.datetime.now().year
+        now = academic_clock.year
         return (now - self.start_year) + 1
 
     @property
-    def elms(self):
+    def _elms(self) -> 'ElmsView':
+        if not hasattr(self, '_elm_mask'):
+            raise AttributeError(f"{self.name}'s ELMs were deleted")
+        return ElmsView(self)
+
+    @property
+    def elms(self) -> 'ElmsView':
         return self._elms
 
     @property
@@ -189,8 +374,11 @@ class Pupil(CastleKilmereMember):
 
         passed = self.passed(grade)
 
+        if subject not in _ELM_BITS:
+            raise ValueError(f"'{subject}' is not an ELM subject")
+
         if passed:
-            self._elms[subject] = True
+            self._elm_mask |= _ELM_BITS[subject]
         else:
             print('The exam was not passed so no ELM was awarded!')
 
@@ -198,7 +386,7 @@ class Pupil(CastleKilmereMember):
     def elms(self):
         print("Caution, you are deleting this students' ELM's! "
               "You should only do that if she/he dropped out of school without passing any exam!")
-        del self._elms
+        del self._elm_mask
 
 
     @staticmethod
@@ -229,47 +417,178 @@ class Pupil(CastleKilmereMember):
                 f"birthyear={self.birthyear}, sex='{self.sex}', "
                 f"start_year={self.start_year})")
 
-    def learn_spell(self, spell: 'Spell'):
-        """ Allows a pupil to learn a spell, given that he/she is old enough """
-        if spell.min_year is not None:
-            if self.current_year >= spell.min_year:
-                print(f"{self.name} now knows '{spell.name}'")
-                self.known_spells.add(spell)
+    def try_learn_spell(self, spell: 'Spell') -> 'SpellOutcome':
+        """ Learns a spell if the pupil is allowed to, without printing anything """
+        outcome = learning_outcome(spell, self)
+        if outcome is SpellOutcome.LEARNED:
+            self.known_spells.add(spell)
+        return outcome
 
-            elif self.exhibits_trait('highly intelligent'):
-                print(f"{self.name} now knows '{spell.name}'")
-                self.known_spells.add(spell)
+    def learn_spell(self, spell: 'Spell') -> 'SpellOutcome':
+        """ Allows a pupil to learn a spell, given that he/she is old enough """
+        outcome = self.try_learn_spell(spell)
+        outcome.announce(self, spell)
+        return outcome
 
-            elif self.current_year < spell.min_year:
-                print(f"{self.name} is too young to study this spell!")
+    def learn_spells(self, spells) -> dict:
+        """ Learns several spells at once without printing anything
 
-        elif spell.__class__.__name__ in ['Hex', 'Curse']:
-            # Only evil pupils would study hexes and curses
-            if self.exhibits_trait('evil'):
-                print(f"{self.name} now knows '{spell.name}'")
-                self.known_spells.add(spell)
+        Returns the spells grouped by their SpellOutcome.
+        """
+        outcomes = {}
+        for spell in spells:
+            outcomes.setdefault(learning_outcome(spell, self), []).append(spell)
+        self.known_spells.update(outcomes.get(SpellOutcome.LEARNED, ()))
+        return outcomes
 
-            else:
-                print(f"How dare you study a hex or curse?!")
+    def try_cast_spell(self, spell: 'Spell') -> 'SpellOutcome':
+        """ Decides whether the pupil can cast a spell, without printing anything """
+        return casting_outcome(spell, self)
 
     def cast_spell(self, spell: 'Spell'):
         """ Allows a pupil to cast a spell """
-        if spell.__class__.__name__ == 'Curse':
-            print("This is dark magic - stay away from performing curses!")
+        outcome = self.try_cast_spell(spell)
+        if outcome is SpellOutcome.CAST:
+            return f"{self.name}: {spell.incantation}!"
+        outcome.announce(self, spell)
 
-        elif spell.__class__.__name__ == 'Hex':
-            if not self.exhibits_trait('evil'):
-                print(f"You shouldn't cast a hex, that's mean!")
 
-        elif spell in self.known_spells:
-            return f"{self.name}: {spell.incantation}!"
+class CompactCastleKilmereMember:
+    """ Creates a member of the Castle Kilmere School of Magic that stores its attributes in __slots__ """
+    __slots__ = ('name', 'birthyear', 'sex', '_true_traits', '_false_traits', '_trait_order')
 
-        elif spell.name not in self.known_spells:
-            print(f"You can't cast the {spell.name} spell correctly "
-                  f" - you have to study it first! ")
+    def __init__(self, name: str, birthyear: int, sex: str):
+        self.name = name
+        self.birthyear = birthyear
+        self.sex = sex
+        self._true_traits = 0
+        self._false_traits = 0
+        self._trait_order = ()
+
+    write_letter = CastleKilmereMember.write_letter
+    says = CastleKilmereMember.says
+    add_trait = CastleKilmereMember.add_trait
+    _traits = CastleKilmereMember._traits
+    print_traits = CastleKilmereMember.print_traits
+    exhibits_trait = CastleKilmereMember.exhibits_trait
+    age = CastleKilmereMember.age
+    school_headmistress = CastleKilmereMember.__dict__['school_headmistress']
+    __repr__ = CastleKilmereMember.__repr__
 
 
-class Spell(ABC):
+class CompactProfessor(CompactCastleKilmereMember):
+    """ Creates a Castle Kilmere professor that stores its attributes in __slots__ """
+    __slots__ = ('subject', 'department')
+
+    def __init__(self, name: str, birthyear: int, sex: str, subject: str, department: str = None):
+        super().__init__(name, birthyear, sex)
+        self.subject = subject
+        self.department = department
+
+    blade = Professor.__dict__['blade']
+    briddle = Professor.__dict__['briddle']
+    radford = Professor.__dict__['radford']
+    giddings = Professor.__dict__['giddings']
+    __repr__ = Professor.__repr__
+
+
+class CompactGhost(CompactCastleKilmereMember):
+    """ Creates a Castle Kilmere ghost that stores its attributes in __slots__ """
+    __slots__ = ('year_of_death',)
+
+    def __init__(self, name: str, birthyear: int, sex: str, year_of_death: int):
+        super().__init__(name, birthyear, sex)
+        self.year_of_death = year_of_death
+
+    age = Ghost.age
+    mocking_knight = Ghost.__dict__['mocking_knight']
+    gray_groom = Ghost.__dict__['gray_groom']
+    scary_scoundrel = Ghost.__dict__['scary_scoundrel']
+    old_lady = Ghost.__dict__['old_lady']
+    boneless_barde = Ghost.__dict__['boneless_barde']
+    __repr__ = Ghost.__repr__
+
+
+class CompactPupil(CompactCastleKilmereMember):
+    """ Creates a Castle Kilmere pupil that stores its attributes in __slots__ """
+    __slots__ = ('start_year', 'known_spells', 'pet_name', 'pet_type', '_elm_mask', '_friends')
+
+    def __init__(self, name: str, birthyear: int, sex: str, start_year: int, pet: tuple = None):
+        super().__init__(name, birthyear, sex)
+        self.start_year = start_year
+        self.known_spells = set()
+
+        # Unlike on Pupil, pet_name and pet_type always exist as slots but
+        # remain unset (and raise AttributeError) for pupils without a pet
+        if pet is not None:
+            self.pet_name, self.pet_type = pet
+
+        self._elm_mask = 0
+
+        self._friends = []
+
+    luke = Pupil.__dict__['luke']
+    lissy = Pupil.__dict__['lissy']
+    adrien = Pupil.__dict__['adrien']
+    current_year = Pupil.current_year
+    _elms = Pupil._elms
+    elms = Pupil.elms
+    friends = Pupil.friends
+    passed = Pupil.__dict__['passed']
+    befriend = Pupil.befriend
+    try_learn_spell = Pupil.try_learn_spell
+    learn_spell = Pupil.learn_spell
+    learn_spells = Pupil.learn_spells
+    try_cast_spell = Pupil.try_cast_spell
+    cast_spell = Pupil.cast_spell
+    __repr__ = Pupil.__repr__
+
+
+def ages(members) -> array:
+    """ Returns the ages of all members, reading the clock only once """
+    now = academic_clock.year
+    return array('i', map(now.__sub__, map(operator.attrgetter('birthyear'), members)))
+
+
+def current_years(pupils) -> array:
+    """ Returns the current school year of all pupils, reading the clock only once """
+    next_year = academic_clock.year + 1
+    return array('i', map(next_year.__sub__, map(operator.attrgetter('start_year'), pupils)))
+
+
+class InternedSpellType(ABCMeta):
+    """ Metaclass that hands out one shared, immutable instance per distinct spell
+
+    Two calls with the same arguments (after filling in defaults) return the
+    very same object, so equal spells are never stored twice.
+    """
+    _signatures = {}
+    _interned = weakref.WeakValueDictionary()
+    _spell_ids = {}
+
+    def spell_key(cls, *args, **kwargs) -> tuple:
+        signature = cls._signatures.get(cls)
+        if signature is None:
+            signature = cls._signatures[cls] = inspect.signature(cls.__init__)
+
+        arguments = signature.bind(None, *args, **kwargs)
+        arguments.apply_defaults()
+        return (cls, *list(arguments.arguments.values())[1:])
+
+    def __call__(cls, *args, **kwargs):
+        key = cls.spell_key(*args, **kwargs)
+        spell = cls._interned.get(key)
+        if spell is None:
+            spell = super().__call__(*args, **kwargs)
+            # Ids outlive the spells themselves, so a spell created again gets its old id back
+            spell_id = cls._spell_ids.setdefault(key, len(cls._spell_ids))
+            object.__setattr__(spell, 'spell_id', spell_id)
+            object.__setattr__(spell, '_key', key)
+            cls._interned[key] = spell
+        return spell
+
+
+class Spell(ABC, metaclass=InternedSpellType):
     """Creates a spell"""
     def __init__(self, name: str, incantation: str, effect: str, difficulty: str = "Simple", min_year: int = 1):
         self.name = name
@@ -277,6 +596,28 @@ class Spell(ABC):
         self.effect = effect
         self.difficulty = difficulty
         self.min_year = min_year
+        # Spells are immutable, so what is said when casting them is computed only once
+        self._words = f"{incantation}!"
+
+    def __setattr__(self, name, value):
+        if '_key' in self.__dict__:
+            raise AttributeError(f"{self.__class__.__name__} spells are immutable")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} spells are immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, Spell):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __reduce__(self):
+        # Unpickled spells go through the metaclass again and stay interned
+        return (self.__class__, self._key[1:])
 
     @abstractmethod
     def cast(self):
@@ -287,6 +628,11 @@ class Spell(ABC):
     def defining_feature(self):
         pass
 
+    @property
+    def countered_by(self) -> frozenset:
+        """ The counter-spells that inhibit the effects of this spell """
+        return counter_spells.counters_of(self)
+
     def __repr__(self):
         return f"{self.__class__.__name__}(name='{self.name}', incantation='{self.incantation}', effect='{self.effect}', difficulty='{self.difficulty}', min_year={self.min_year})"
 
@@ -302,7 +648,7 @@ class Charm(Spell):
                 "that is, its behaviour and capabilities")
 
     def cast(self) -> str:
-        return(f"{self.incantation}!")
+        return self._words
 
     @classmethod
     def stuporus_ratiato(cls) -> 'Charm':
@@ -327,7 +673,7 @@ class Transfiguration(Spell):
         return cls('The Alteraro Canieo transfiguration', 'Alteraro Canieo', 'Turns an object into a can', 'Simple', 2)
 
     def cast(self) -> str:
-        return(f"{self.incantation}!")
+        return self._words
 
 class Jinx(Spell):
     """Creates a jinx - a spell whose effects are irritating but amusing"""
@@ -345,7 +691,7 @@ class Jinx(Spell):
         return cls('The Inceptotis jinx', 'Inceptotis', 'Makes a person talk baby talk', 'Simple')
 
     def cast(self) -> str:
-        return(f"{self.incantation}!")
+        return self._words
 
 class Hex(Spell):
     """Creates a hex - a spell that affects an object in a negative manner"""
@@ -362,8 +708,12 @@ class Hex(Spell):
     def rectaro(cls) -> 'Hex':
         return cls('The Rectaro hex', 'Rectaro', 'Exchanges a persons arms and legs', 'Difficult')
 
+    @classmethod
+    def immolim(cls) -> 'Hex':
+        return cls('The Immolim hex', 'Immolim', 'Immobilises a person so that they cannot move')
+
     def cast(self) -> str:
-        return(f"{self.incantation}!")
+        return self._words
 
 class Curse(Spell):
     """Creates a curse - a spell that affects an object in a stflynngly negative manner"""
@@ -381,7 +731,7 @@ class Curse(Spell):
                    'Tortures a person, makes person suffer deeply', 'Difficult')
 
     def cast(self) -> str:
-        return(f"{self.incantation}!")
+        return self._words
 
 class CounterSpell(Spell):
     """Creates a counter-spell - a spell that inhibits the effect of another spell"""
@@ -392,13 +742,18 @@ class CounterSpell(Spell):
     def defining_feature(self) -> str:
         return ("Inhibites the effects of another spell")
 
+    @property
+    def neutralises(self) -> frozenset:
+        """ The spells whose effects this counter-spell inhibits """
+        return counter_spells.neutralised_by(self)
+
     @classmethod
     def mufindo_immolim(cls) -> 'CounterSpell':
         return cls('The Mufindo Immolim counter spell', 'Mufindo Immolim',
                    'Counteracts the immobilisation spell that prevents a person from moving')
 
     def cast(self) -> str:
-        return(f"{self.incantation}!")
+        return self._words
 
 class HealingSpell(Spell):
     """Creates a healing-spell - a spell that improves the condition of a living object"""
@@ -415,7 +770,180 @@ class HealingSpell(Spell):
                    'Heals all kinds of wounds, even bad ones', 'Difficult', 5)
 
     def cast(self) -> str:
-        return(f"{self.incantation}!")
+        return self._words
+
+
+class CounterSpellIndex:
+    """ Remembers which counter-spells neutralise which spells, in both directions """
+    def __init__(self):
+        self._counters_of = {}
+        self._neutralised_by = {}
+
+    def register(self, counter_spell: CounterSpell, *spells: Spell):
+        """ Records that counter_spell neutralises each of the given spells """
+        if not isinstance(counter_spell, CounterSpell):
+            raise TypeError(f"{counter_spell!r} is not a counter-spell")
+
+        neutralised = self._neutralised_by.setdefault(counter_spell, set())
+        for spell in spells:
+            neutralised.add(spell)
+            self._counters_of.setdefault(spell, set()).add(counter_spell)
+
+    def counters_of(self, spell: Spell) -> frozenset:
+        return frozenset(self._counters_of.get(spell, ()))
+
+    def neutralised_by(self, counter_spell: CounterSpell) -> frozenset:
+        return frozenset(self._neutralised_by.get(counter_spell, ()))
+
+    def neutralises(self, counter_spell: CounterSpell, spell: Spell) -> bool:
+        return spell in self._neutralised_by.get(counter_spell, ())
+
+
+counter_spells = CounterSpellIndex()
+counter_spells.register(CounterSpell.mufindo_immolim(), Hex.immolim())
+
+
+class SpellOutcome(Enum):
+    """ What happened when a pupil tried to learn or cast a spell """
+    LEARNED = 'learned'
+    TOO_YOUNG = 'too young'
+    FORBIDDEN = 'forbidden'
+    NOT_TEACHABLE = 'not teachable'
+    CAST = 'cast'
+    DARK_MAGIC = 'dark magic'
+    MEAN = 'mean'
+    NOT_STUDIED = 'not studied'
+
+    def announce(self, pupil: Pupil, spell: Spell):
+        """ Prints the message pupils have always been given for this outcome """
+        message = _OUTCOME_MESSAGES.get(self)
+        if message is not None:
+            print(message.format(pupil=pupil, spell=spell))
+
+
+_OUTCOME_MESSAGES = {
+    SpellOutcome.LEARNED: "{pupil.name} now knows '{spell.name}'",
+    SpellOutcome.TOO_YOUNG: "{pupil.name} is too young to study this spell!",
+    SpellOutcome.FORBIDDEN: "How dare you study a hex or curse?!",
+    SpellOutcome.DARK_MAGIC: "This is dark magic - stay away from performing curses!",
+    SpellOutcome.MEAN: "You shouldn't cast a hex, that's mean!",
+    SpellOutcome.NOT_STUDIED: "You can't cast the {spell.name} spell correctly  - you have to study it first! ",
+}
+
+
+# The rules for learning and casting are looked up by the type of the spell.
+# functools.singledispatch follows the MRO, so subclasses of Hex or Curse get
+# the rules of their parents, and caches the rule it found for each type.
+
+@functools.singledispatch
+def learning_outcome(spell: Spell, pupil: Pupil) -> SpellOutcome:
+    """ Pupils can learn spells once they reach the spell's min_year, or earlier if highly intelligent """
+    if spell.min_year is None:
+        return SpellOutcome.NOT_TEACHABLE
+    if pupil.current_year >= spell.min_year or pupil.exhibits_trait('highly intelligent'):
+        return SpellOutcome.LEARNED
+    return SpellOutcome.TOO_YOUNG
+
+
+@learning_outcome.register(Hex)
+@learning_outcome.register(Curse)
+def _learning_dark_magic(spell: Spell, pupil: Pupil) -> SpellOutcome:
+    """ Hexes and curses without a min_year are only studied by evil pupils """
+    if spell.min_year is not None:
+        return learning_outcome.dispatch(Spell)(spell, pupil)
+    if pupil.exhibits_trait('evil'):
+        return SpellOutcome.LEARNED
+    return SpellOutcome.FORBIDDEN
+
+
+@functools.singledispatch
+def casting_outcome(spell: Spell, pupil: Pupil) -> SpellOutcome:
+    """ Pupils can cast the spells they know """
+    if spell in pupil.known_spells:
+        return SpellOutcome.CAST
+    return SpellOutcome.NOT_STUDIED
+
+
+@casting_outcome.register(Curse)
+def _casting_curse(spell: Curse, pupil: Pupil) -> SpellOutcome:
+    return SpellOutcome.DARK_MAGIC
+
+
+@casting_outcome.register(Hex)
+def _casting_hex(spell: Hex, pupil: Pupil) -> SpellOutcome:
+    if not pupil.exhibits_trait('evil'):
+        return SpellOutcome.MEAN
+    return casting_outcome.dispatch(Spell)(spell, pupil)
+
+
+class CastResult(NamedTuple):
+    """ Record of a single cast: its outcome, who cast it and the spell's id
+
+    caster_id is an index into the casters of the batch (see CastBatch), so
+    casters that share a name are still told apart. cast_many() has only one
+    caster, whose id is 0.
+    """
+    status: SpellOutcome
+    caster_id: int
+    spell_id: int
+
+
+class CastBatch(NamedTuple):
+    """ The records of a cast_batch() and its distinct casters, in order of their first cast """
+    results: list
+    casters: list
+
+    def caster(self, result: CastResult):
+        return self.casters[result.caster_id]
+
+
+def _casting_rule(caster):
+    # Members without their own casting rules (like the Dark Army) can cast anything
+    try_cast_spell = getattr(caster, 'try_cast_spell', None)
+    if try_cast_spell is None:
+        return lambda spell: SpellOutcome.CAST
+    return try_cast_spell
+
+
+def cast_many(caster, spells) -> list:
+    """ Lets one caster cast many spells without printing anything
+
+    The outcome is decided only once per distinct spell.
+    """
+    decide = _casting_rule(caster)
+    results = {}
+    cast = []
+    for spell in spells:
+        result = results.get(spell)
+        if result is None:
+            result = results[spell] = CastResult(decide(spell), 0, spell.spell_id)
+        cast.append(result)
+    return cast
+
+
+def cast_batch(pairs) -> CastBatch:
+    """ Casts every (caster, spell) pair without printing anything
+
+    pairs may be any iterable; the casters are collected as they come, so
+    result.caster_id always points into the returned casters.
+    """
+    rules = {}
+    casters = []
+    results = {}
+    cast = []
+    for caster, spell in pairs:
+        key = (id(caster), spell)
+        result = results.get(key)
+        if result is None:
+            rule = rules.get(id(caster))
+            if rule is None:
+                # casters keeps every caster alive, so its id can't be reused within the batch
+                rule = rules[id(caster)] = (len(casters), _casting_rule(caster))
+                casters.append(caster)
+            caster_id, decide = rule
+            result = results[key] = CastResult(decide(spell), caster_id, spell.spell_id)
+        cast.append(result)
+    return CastBatch(cast, casters)
 
 
 @dataclass(frozen=True)
@@ -430,7 +958,7 @@ class DarkArmyMember():
         return master_odon
 
     def cast_spell(self, spell) -> str:
-        return(f"{self.name}: {spell.incantation}!")
+        return f"{self.name}: {spell._words}"
 
 
 @dataclass
@@ -441,41 +969,136 @@ class Department:
     founded_in: int = 991
 
     def current_age(self):
-        now = datetime.datetime.now().year
+        now = academic_clock.year
         return (now - self.founded_in) + 1
 
 
 class Letter:
+    """ Creates a letter that is written to the file letter_name
+
+    If an archive is given, the letter is collected in memory instead and
+    appended to the archive for recipient (or letter_name) once the with
+    block ends without an error. Whatever the archive returns for it is kept
+    as the receipt. Such letters are counted in total_number_of_letters by
+    the archive once it accepts them, so rejected letters aren't counted.
+    """
     total_number_of_letters = 0
 
-    def __init__(self, letter_name):
+    def __init__(self, letter_name, archive=None, recipient=None):
         self.letter_name = letter_name
+        self.archive = archive
+        self.recipient = letter_name if recipient is None else recipient
+        self.receipt = None
 
     def __enter__(self):
-        self.letter = open(self.letter_name, 'w')
-        self.__class__.total_number_of_letters += 1
+        if self.archive is None:
+            self.letter = open(self.letter_name, 'w')
+            self.__class__.total_number_of_letters += 1
+        else:
+            self.letter = io.StringIO()
         return self.letter
 
     def __exit__(self, exc_type, exc_value, traceback):
         if self.letter:
+            if self.archive is not None and exc_type is None:
+                self.receipt = self.archive.append(self.recipient, self.letter.getvalue())
             self.letter.close()
 
-class Potion:
-    """ Creates a potion """
+class IngredientTable:
+    """ Gives every ingredient a small integer id shared by all potions """
+
+    # Potions store ids as unsigned 16-bit integers
+    MAX_INGREDIENTS = 2**16
+
+    def __init__(self):
+        self._ids = {}
+        self.names = []
+
+    def id(self, ingredient: str) -> int:
+        """ Returns the id of an ingredient, registering the ingredient if it is new """
+        ingredient_id = self._ids.get(ingredient)
+        if ingredient_id is None:
+            if len(self.names) == self.MAX_INGREDIENTS:
+                raise ValueError(f"The ingredient table is full, cannot add '{ingredient}'")
+            ingredient_id = self._ids[ingredient] = len(self.names)
+            self.names.append(sys.intern(ingredient))
+        return ingredient_id
+
+    def lookup(self, ingredient: str) -> int:
+        """ Returns the id of an ingredient or None if no potion uses it """
+        return self._ids.get(ingredient)
+
+    def encode(self, ingredients) -> array:
+        return array('H', map(self.id, ingredients))
+
+    def decode(self, ingredient_ids):
+        return map(self.names.__getitem__, ingredient_ids)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+ingredient_table = IngredientTable()
+
+
+class Potion(Sequence):
+    """ Creates a potion - an immutable sequence of ingredients
+
+    The recipe is stored as an array of ingredient ids from ingredient_table
+    and only turned back into names while iterating.
+    """
+    __slots__ = ('_ids',)
+
     def __init__(self, ingredients):
-        self.ingredients = ingredients
-        self.counter = -1
+        self._ids = ingredient_table.encode(ingredients)
+
+    @property
+    def ingredients(self) -> tuple:
+        return tuple(self)
+
+    @property
+    def ingredient_ids(self) -> memoryview:
+        """ Read-only view of the ingredient ids of the recipe """
+        return memoryview(self._ids).toreadonly()
 
     def __iter__(self):
-        return self
+        # A fresh iterator every time, so a potion can be iterated again and by several loops at once
+        return ingredient_table.decode(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(ingredient_table.decode(self._ids[index]))
+        return ingredient_table.names[self._ids[index]]
+
+    def __contains__(self, ingredient) -> bool:
+        ingredient_id = ingredient_table.lookup(ingredient)
+        return ingredient_id is not None and ingredient_id in self._ids
 
-    def __next__(self):
-        self.counter += 1
+    def __eq__(self, other):
+        if not isinstance(other, Potion):
+            return NotImplemented
+        return self._ids == other._ids
+
+    def __hash__(self):
+        return hash(self._ids.tobytes())
+
+    def __reduce__(self):
+        # Ingredient ids only mean something in this process, so the recipe travels by name
+        return (self.__class__, (tuple(self),))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self)})"
 
-        if self.counter == len(self.ingredients):
-            raise StopIteration
 
-        return self.ingredients[self.counter]
+def concatenated_ingredient_ids(potions) -> array:
+    """ Returns the ingredient ids of all potions, one recipe after the other """
+    ingredient_ids = array('H')
+    for potion in potions:
+        ingredient_ids.extend(potion._ids)
+    return ingredient_ids
 
 
 if __name__ == "__main__":
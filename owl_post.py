@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from magical_universe import Letter
+from letters import LetterArchive
+
+
+class OwlPost:
+    """ Delivers letters to an archive in the background
+
+    Letters wait in a queue of at most max_pending letters and are written
+    to the archive in batches of up to batch_size by a worker thread, so the
+    event loop never waits for the disk. Every letter gets a future that
+    resolves to its number in the archive once it has been written.
+
+    send() waits while the queue is full. append() is the non-waiting
+    variant used by Letter and write_letter(..., archive=owl_post); it
+    raises asyncio.QueueFull instead. Both have to be called from the event
+    loop the owl post runs in. A letter counts towards
+    Letter.total_number_of_letters once it is in the queue.
+    """
+    def __init__(self, archive: LetterArchive, max_pending: int = 10_000, batch_size: int = 1000,
+                 executor: ThreadPoolExecutor = None):
+        self.archive = archive
+        self.batch_size = batch_size
+        self._queue = asyncio.Queue(max_pending)
+        self._own_executor = executor is None
+        self._executor = ThreadPoolExecutor(max_workers=1) if executor is None else executor
+        # The archive isn't thread-safe, even if the executor has several threads
+        self._archive_lock = threading.Lock()
+        self._worker = None
+        self._closed = False
+
+    def start(self):
+        """ Starts delivering letters, needs a running event loop """
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._deliver())
+
+    def _letter(self, recipient: str, content: str) -> tuple:
+        if self._closed:
+            raise RuntimeError("The owl post is closed")
+        self.start()
+        return recipient, content, asyncio.get_running_loop().create_future()
+
+    @staticmethod
+    def _accepted(letter: tuple) -> asyncio.Future:
+        Letter.total_number_of_letters += 1
+        return letter[2]
+
+    def append(self, recipient: str, content: str) -> asyncio.Future:
+        """ Queues a letter without waiting and returns its future """
+        letter = self._letter(recipient, content)
+        self._queue.put_nowait(letter)
+        return self._accepted(letter)
+
+    async def send(self, recipient: str, content: str) -> asyncio.Future:
+        """ Queues a letter, waiting for room in the queue, and returns its future """
+        letter = self._letter(recipient, content)
+        await self._queue.put(letter)
+        return self._accepted(letter)
+
+    def _write(self, batch: list) -> list:
+        with self._archive_lock:
+            # The letters were counted when they were queued
+            numbers = [self.archive.append(recipient, content, count=False) for recipient, content, _ in batch]
+            self.archive.flush()
+        return numbers
+
+    async def _deliver(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                numbers = await loop.run_in_executor(self._executor, self._write, batch)
+            except Exception as error:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+            else:
+                for number, (_, _, future) in zip(numbers, batch):
+                    if not future.done():
+                        future.set_result(number)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def drain(self):
+        """ Waits until every queued letter has been written """
+        if self._worker is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """ Delivers the remaining letters and stops the owl post; the archive stays open """
+        self._closed = True
+        await self.drain()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._own_executor:
+            self._executor.shutdown()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.archive!r}, {self._queue.qsize()} letters pending)"
@@ -0,0 +1,162 @@
+import bisect
+
+from array import array
+
+from magical_universe import Potion, ingredient_table
+
+
+def intersection(smaller: array, larger: array) -> array:
+    """ Returns the ids that are in both sorted arrays
+
+    If one posting list is much shorter than the other, every id of the
+    shorter one is looked up in the longer one with a binary search that
+    starts where the previous one ended. Lists of similar length are
+    intersected with a set, which is cheaper in Python than merging them.
+    """
+    if len(smaller) > len(larger):
+        smaller, larger = larger, smaller
+    if len(smaller) * 16 >= len(larger):
+        return array('I', sorted(set(smaller).intersection(larger)))
+
+    found = array('I')
+    start, end = 0, len(larger)
+    for potion_id in smaller:
+        start = bisect.bisect_left(larger, potion_id, start, end)
+        if start == end:
+            break
+        if larger[start] == potion_id:
+            found.append(potion_id)
+    return found
+
+
+def union(postings) -> array:
+    """ Returns the sorted ids that are in any of the sorted arrays """
+    return array('I', sorted(set().union(*postings)))
+
+
+def difference(included: array, excluded: array) -> array:
+    """ Returns the ids of the sorted array included that are not in excluded """
+    if not excluded:
+        return array('I', included)
+    if len(excluded) < len(included):
+        excluded = set(excluded)
+        return array('I', [potion_id for potion_id in included if potion_id not in excluded])
+
+    found = array('I')
+    start, end = 0, len(excluded)
+    for potion_id in included:
+        start = bisect.bisect_left(excluded, potion_id, start, end)
+        if start == end or excluded[start] != potion_id:
+            found.append(potion_id)
+    return found
+
+
+class PotionIndex:
+    """ Creates an index from ingredients to the potions that use them
+
+    Every potion gets an id when it is added; ids are never reused, so the
+    posting list of every ingredient stays sorted just by appending. Queries
+    combine posting lists with sorted-array intersection, union and
+    difference instead of looking at every potion.
+    """
+    def __init__(self, potions=()):
+        self._potions = {}
+        self._postings = {}
+        self._next_id = 0
+        for potion in potions:
+            self.add(potion)
+
+    def add(self, potion: Potion) -> int:
+        """ Adds potion to the index and returns its id """
+        if not isinstance(potion, Potion):
+            raise TypeError(f"Only potions can be indexed, not {potion!r}")
+        potion_id = self._next_id
+        self._next_id += 1
+        self._potions[potion_id] = potion
+
+        postings = self._postings
+        for ingredient_id in set(potion._ids):
+            posting = postings.get(ingredient_id)
+            if posting is None:
+                posting = postings[ingredient_id] = array('I')
+            posting.append(potion_id)
+        return potion_id
+
+    def remove(self, potion_id: int) -> Potion:
+        """ Removes the potion with the given id from the index and returns it """
+        try:
+            potion = self._potions.pop(potion_id)
+        except KeyError:
+            raise KeyError(f"No potion with id {potion_id} in the index") from None
+
+        for ingredient_id in set(potion._ids):
+            posting = self._postings[ingredient_id]
+            del posting[bisect.bisect_left(posting, potion_id)]
+            if not posting:
+                del self._postings[ingredient_id]
+        return potion
+
+    def _posting(self, ingredient: str) -> array:
+        ingredient_id = ingredient_table.lookup(ingredient)
+        return self._postings.get(ingredient_id, array('I'))
+
+    def with_ingredient(self, ingredient: str) -> array:
+        """ Returns the sorted ids of all potions that use ingredient """
+        return array('I', self._posting(ingredient))
+
+    def query(self, all_of=(), any_of=(), none_of=()) -> array:
+        """ Returns the sorted ids of the potions matching all conditions
+
+        A potion matches if it uses every ingredient in all_of, at least one
+        ingredient in any_of (if any are given) and none of the ingredients
+        in none_of.
+        """
+        if all_of:
+            postings = sorted(map(self._posting, all_of), key=len)
+            found = postings[0]
+            for posting in postings[1:]:
+                if not found:
+                    break
+                found = intersection(found, posting)
+        else:
+            found = None
+
+        if any_of:
+            postings = map(self._posting, any_of)
+            if found is None:
+                found = union(postings)
+            else:
+                # Filter the candidates instead of building the whole union
+                found = union(intersection(found, posting) for posting in postings)
+
+        if found is None:
+            found = array('I', self._potions)
+
+        for ingredient in none_of:
+            if not found:
+                break
+            found = difference(found, self._posting(ingredient))
+
+        return array('I', found)
+
+    def potions(self, potion_ids) -> list:
+        return [self._potions[potion_id] for potion_id in potion_ids]
+
+    def ingredients(self) -> list:
+        """ Returns the names of all ingredients used by an indexed potion """
+        return [ingredient_table.names[ingredient_id] for ingredient_id in self._postings]
+
+    def __getitem__(self, potion_id: int) -> Potion:
+        return self._potions[potion_id]
+
+    def __contains__(self, potion_id) -> bool:
+        return potion_id in self._potions
+
+    def __iter__(self):
+        return iter(self._potions.items())
+
+    def __len__(self) -> int:
+        return len(self._potions)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} potions, {len(self._postings)} ingredients)"
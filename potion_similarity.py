@@ -0,0 +1,159 @@
+import heapq
+import random
+
+from typing import NamedTuple
+
+from magical_universe import Potion
+
+# A Mersenne prime larger than any ingredient id, used by the hash functions
+PRIME = 2**61 - 1
+
+
+def jaccard(first: Potion, second: Potion) -> float:
+    """ Returns the share of distinct ingredients two potions have in common """
+    return _jaccard(frozenset(first._ids), frozenset(second._ids))
+
+
+def _jaccard(first: frozenset, second: frozenset) -> float:
+    union = len(first | second)
+    return len(first & second) / union if union else 1.0
+
+
+class MinHasher:
+    """ Creates MinHash signatures of potions
+
+    Every position of a signature is the smallest value of one random hash
+    function (a * ingredient_id + b) mod PRIME over the ingredients of the
+    potion. The share of positions in which two signatures agree estimates
+    the Jaccard similarity of the potions. The hashes of every ingredient are
+    computed once, so a signature is a single element-wise min.
+    """
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._coefficients = [(rng.randrange(1, PRIME), rng.randrange(PRIME)) for _ in range(num_perm)]
+        self._hashes = {}
+        self._empty = (PRIME,) * num_perm
+
+    def _ingredient_hashes(self, ingredient_id: int) -> tuple:
+        hashes = self._hashes.get(ingredient_id)
+        if hashes is None:
+            hashes = self._hashes[ingredient_id] = tuple((a * ingredient_id + b) % PRIME
+                                                         for a, b in self._coefficients)
+        return hashes
+
+    def signature(self, potion: Potion) -> tuple:
+        ingredient_ids = set(potion._ids)
+        if not ingredient_ids:
+            return self._empty
+        if len(ingredient_ids) == 1:
+            # map(min, single) would call min() on single integers
+            return self._ingredient_hashes(ingredient_ids.pop())
+        return tuple(map(min, *map(self._ingredient_hashes, ingredient_ids)))
+
+    @staticmethod
+    def estimate(first: tuple, second: tuple) -> float:
+        """ Estimates the Jaccard similarity from two signatures """
+        return sum(map(int.__eq__, first, second)) / len(first)
+
+
+class Match(NamedTuple):
+    potion_id: int
+    potion: Potion
+    similarity: float
+
+
+class SimilarPotionIndex:
+    """ Finds potions with similar ingredients using locality-sensitive hashing
+
+    Signatures are cut into bands of rows positions each; potions that agree
+    on all rows of at least one band land in the same bucket and become
+    candidates. Only candidates are compared exactly, so a query doesn't look
+    at every potion. More bands (or fewer rows) find more similar potions at
+    the cost of more candidates; see threshold.
+    """
+    def __init__(self, potions=(), bands: int = 16, rows: int = 4, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        self.hasher = MinHasher(bands * rows, seed)
+        self._potions = {}
+        self._ingredients = {}
+        self._signatures = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._next_id = 0
+        for potion in potions:
+            self.add(potion)
+
+    @property
+    def threshold(self) -> float:
+        """ The similarity at which a pair has a 50 % chance of becoming candidates """
+        return (1 / self.bands) ** (1 / self.rows)
+
+    def _band_keys(self, signature: tuple):
+        rows = self.rows
+        return (signature[start:start + rows] for start in range(0, self.bands * rows, rows))
+
+    def add(self, potion: Potion) -> int:
+        """ Adds potion to the index and returns its id """
+        if not isinstance(potion, Potion):
+            raise TypeError(f"Only potions can be indexed, not {potion!r}")
+        potion_id = self._next_id
+        self._next_id += 1
+        signature = self.hasher.signature(potion)
+        self._potions[potion_id] = potion
+        self._ingredients[potion_id] = frozenset(potion._ids)
+        self._signatures[potion_id] = signature
+
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [potion_id]
+            else:
+                bucket.append(potion_id)
+        return potion_id
+
+    def remove(self, potion_id: int) -> Potion:
+        """ Removes the potion with the given id from the index and returns it """
+        try:
+            potion = self._potions.pop(potion_id)
+        except KeyError:
+            raise KeyError(f"No potion with id {potion_id} in the index") from None
+        del self._ingredients[potion_id]
+
+        for buckets, key in zip(self._buckets, self._band_keys(self._signatures.pop(potion_id))):
+            bucket = buckets[key]
+            bucket.remove(potion_id)
+            if not bucket:
+                del buckets[key]
+        return potion
+
+    def candidates(self, potion: Potion) -> set:
+        """ Returns the ids of all potions sharing at least one band with potion """
+        found = set()
+        for buckets, key in zip(self._buckets, self._band_keys(self.hasher.signature(potion))):
+            found.update(buckets.get(key, ()))
+        return found
+
+    def similar(self, potion: Potion, k: int = 10, min_similarity: float = 0.0) -> list:
+        """ Returns up to k Matches, most similar first
+
+        Candidates are ranked by their exact Jaccard similarity to potion.
+        Similar potions that share no band with potion are missed.
+        """
+        ingredients = frozenset(potion._ids)
+        scored = ((_jaccard(ingredients, self._ingredients[potion_id]), -potion_id)
+                  for potion_id in self.candidates(potion))
+        best = heapq.nlargest(k, (entry for entry in scored if entry[0] >= min_similarity))
+        return [Match(-negated_id, self._potions[-negated_id], similarity) for similarity, negated_id in best]
+
+    def __getitem__(self, potion_id: int) -> Potion:
+        return self._potions[potion_id]
+
+    def __contains__(self, potion_id) -> bool:
+        return potion_id in self._potions
+
+    def __len__(self) -> int:
+        return len(self._potions)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} potions, {self.bands} bands x {self.rows} rows)"
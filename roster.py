@@ -0,0 +1,335 @@
+import itertools
+import operator
+
+from array import array
+
+from magical_universe import CastleKilmereMember, Pupil, Professor, Ghost, elm_mask, current_academic_year
+
+# Value stored in integer columns of rows that don't have the field
+MISSING = -2**31
+
+
+class _StringColumn:
+    """ Stores repeated strings as small integer codes into a shared table """
+    def __init__(self, typecode: str = 'I'):
+        self.codes = array(typecode)
+        self.values = []
+        self._lookup = {}
+
+    def append(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def __setitem__(self, index, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes[index] = code
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class _LazyColumn:
+    """ Stores one container (like a set or list) per row, only creating the ones that are actually used """
+    def __init__(self, container: type):
+        self.container = container
+        self.items = []
+
+    def append(self, value):
+        self.items.append(self.container(value) if value else None)
+
+    def __getitem__(self, index):
+        found = self.items[index]
+        if found is None:
+            found = self.items[index] = self.container()
+        return found
+
+    def __setitem__(self, index, value):
+        self.items[index] = value
+
+    def __iter__(self):
+        return (found if found is not None else self.container() for found in self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class RosterRow:
+    """ A lightweight view on a single member stored in a Roster
+
+    The row reports the class of the member it stands for, so it can be
+    used wherever a CastleKilmereMember, Pupil, Professor or Ghost is used:
+    traits, ELMs, known spells, pets and friends are stored in the roster
+    and can be changed through the row, also by property setters like
+    Pupil.elms. Two rows are equal if they stand for the same member of the
+    same roster.
+    """
+    __slots__ = ('_roster', '_index')
+
+    def __init__(self, roster: 'Roster', index: int):
+        self._roster = roster
+        self._index = index
+
+    @property
+    def __class__(self):
+        return self._roster.kind(self._index)
+
+    @property
+    def name(self) -> str:
+        return self._roster._names[self._index]
+
+    @property
+    def birthyear(self) -> int:
+        return self._roster._birthyears[self._index]
+
+    @property
+    def sex(self) -> str:
+        return self._roster._sexes[self._index]
+
+    def __getattr__(self, name):
+        kind = self.__class__
+        if name in self._roster.fields(kind):
+            value = self._roster._columns[name][self._index]
+            if value is None and name in self._roster.OPTIONAL_FIELDS:
+                raise AttributeError(f"{kind.__name__} row has no attribute '{name}'")
+            return value
+
+        # Borrow methods and properties (says, age, current_year, ...) from the member's class
+        for klass in kind.__mro__:
+            if name in vars(klass):
+                attribute = vars(klass)[name]
+                if hasattr(attribute, '__get__'):
+                    return attribute.__get__(self, kind)
+                return attribute
+
+        raise AttributeError(f"{kind.__name__} row has no attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        if name in RosterRow.__slots__:
+            object.__setattr__(self, name, value)
+            return
+        kind = self.__class__
+        if name in self._roster.fields(kind):
+            self._roster._columns[name][self._index] = value
+            return
+
+        # Properties with a setter (like Pupil.elms) store their result through the row
+        for klass in kind.__mro__:
+            if name in vars(klass):
+                attribute = vars(klass)[name]
+                if hasattr(attribute, '__set__'):
+                    attribute.__set__(self, value)
+                    return
+                break
+
+        raise AttributeError(f"Cannot set '{name}' of a {kind.__name__} row")
+
+    def __eq__(self, other):
+        if not isinstance(other, RosterRow):
+            return NotImplemented
+        return self._roster is other._roster and self._index == other._index
+
+    def __hash__(self):
+        return hash((id(self._roster), self._index))
+
+    def __repr__(self) -> str:
+        return self.__class__.__repr__(self)
+
+
+class Roster:
+    """ Creates a roster that stores Castle Kilmere members in typed parallel columns """
+
+    # Fields stored for every member in addition to name, birthyear and sex
+    MEMBER_FIELDS = ('_true_traits', '_false_traits', '_trait_order')
+
+    # Fields stored only for members of the given classes
+    FIELDS = {
+        Pupil: ('start_year', '_elm_mask', 'known_spells', 'pet_name', 'pet_type', '_friends'),
+        Professor: ('subject', 'department'),
+        Ghost: ('year_of_death',),
+    }
+
+    # Fields that a member may not have at all, like the pet of a pupil without one
+    OPTIONAL_FIELDS = ('pet_name', 'pet_type')
+
+    # Values used for fields that aren't passed to add()
+    DEFAULTS = {
+        '_true_traits': 0,
+        '_false_traits': 0,
+        '_trait_order': (),
+        '_elm_mask': 0,
+        'known_spells': None,
+        'pet_name': None,
+        'pet_type': None,
+        '_friends': None,
+        'department': None,
+    }
+
+    def __init__(self, members=()):
+        self._names = []
+        self._birthyears = array('i')
+        self._sexes = _StringColumn('B')
+        self._kind_codes = array('B')
+        self._kinds = []
+        self._columns = {
+            # Trait bitsets can grow past 64 bits, so they are kept as Python ints
+            '_true_traits': [],
+            '_false_traits': [],
+            '_trait_order': [],
+            'start_year': array('i'),
+            '_elm_mask': array('H'),
+            'known_spells': _LazyColumn(set),
+            'pet_name': _StringColumn('I'),
+            'pet_type': _StringColumn('H'),
+            '_friends': _LazyColumn(list),
+            'subject': _StringColumn('I'),
+            'department': _StringColumn('I'),
+            'year_of_death': array('i'),
+        }
+
+        for member in members:
+            self.append(member)
+
+    def fields(self, kind: type) -> tuple:
+        """ Returns the additional fields stored for members of the given class """
+        for klass in kind.__mro__:
+            if klass in self.FIELDS:
+                return self.MEMBER_FIELDS + self.FIELDS[klass]
+        return self.MEMBER_FIELDS
+
+    def add(self, kind: type, name: str, birthyear: int, sex: str, **fields) -> RosterRow:
+        """ Adds a member without creating a full member object """
+        if not issubclass(kind, CastleKilmereMember):
+            raise TypeError(f"A roster can only store Castle Kilmere members, not {kind.__name__}")
+
+        if kind not in self._kinds:
+            self._kinds.append(kind)
+
+        own_fields = self.fields(kind)
+        unknown = set(fields) - set(own_fields)
+        if unknown:
+            raise TypeError(f"{kind.__name__} has no field(s) {', '.join(sorted(unknown))}")
+        missing = set(own_fields) - set(fields) - set(self.DEFAULTS)
+        if missing:
+            raise TypeError(f"{kind.__name__} is missing field(s) {', '.join(sorted(missing))}")
+
+        self._names.append(name)
+        self._birthyears.append(birthyear)
+        self._sexes.append(sex)
+        self._kind_codes.append(self._kinds.index(kind))
+
+        for field, column in self._columns.items():
+            if field in own_fields:
+                column.append(fields.get(field, self.DEFAULTS.get(field)))
+            else:
+                column.append(self._missing(column))
+
+        return self[len(self) - 1]
+
+    @staticmethod
+    def _missing(column):
+        if not isinstance(column, array):
+            return None
+        # Unsigned columns can't hold the negative MISSING marker
+        return MISSING if column.typecode == 'i' else 0
+
+    def append(self, member: CastleKilmereMember) -> RosterRow:
+        """ Copies the fields of an existing member into the roster """
+        kind = type(member)
+        # Optional fields the member doesn't have are filled in by add()
+        fields = {field: getattr(member, field) for field in self.fields(kind) if hasattr(member, field)}
+        return self.add(kind, member.name, member.birthyear, member.sex, **fields)
+
+    def kind(self, index: int) -> type:
+        return self._kinds[self._kind_codes[index]]
+
+    def column(self, name: str):
+        """ Returns the column with the given name, e.g. 'birthyear' or 'subject' """
+        columns = {
+            'name': self._names,
+            'birthyear': self._birthyears,
+            'sex': self._sexes,
+            **self._columns,
+        }
+        try:
+            return columns[name]
+        except KeyError:
+            raise KeyError(f"The roster has no column '{name}'") from None
+
+    def where(self, column: str, condition) -> list:
+        """ Returns the indices of all rows whose value in column satisfies condition
+
+        Passing a C-level callable like 1960 .__gt__ keeps the whole scan out
+        of the interpreter loop. Rows whose class doesn't have the column are
+        never returned.
+        """
+        return self._matching_rows(column, map(condition, self.column(column)))
+
+    def _matching_rows(self, column: str, matches) -> list:
+        if column in self._columns:
+            has_column = {code for code, kind in enumerate(self._kinds) if column in self.fields(kind)}
+            matches = map(operator.and_, matches, map(has_column.__contains__, self._kind_codes))
+
+        return list(itertools.compress(range(len(self)), matches))
+
+    def ages(self) -> array:
+        """ Returns the age of every member, in row order """
+        now = current_academic_year()
+        return array('i', map(now.__sub__, self._birthyears))
+
+    def current_years(self) -> array:
+        """ Returns the current school year of every pupil, in row order
+
+        Rows of members that aren't pupils hold MISSING.
+        """
+        next_year = current_academic_year() + 1
+        start_years = self._columns['start_year']
+        years = array('i', start_years)
+        for index in self._matching_rows('start_year', itertools.repeat(True)):
+            years[index] = next_year - start_years[index]
+        return years
+
+    def select(self, indices) -> list:
+        return [RosterRow(self, index) for index in indices]
+
+    def born_before(self, year: int) -> list:
+        return self.select(self.where('birthyear', year.__gt__))
+
+    def with_elms(self, *subjects: str) -> list:
+        """ Returns all pupils that hold every one of the given ELMs """
+        required = elm_mask(*subjects)
+        held = map(required.__and__, self._columns['_elm_mask'])
+        return self.select(self._matching_rows('_elm_mask', map(required.__eq__, held)))
+
+    def of_kind(self, kind: type) -> list:
+        if kind not in self._kinds:
+            return []
+        code = self._kinds.index(kind)
+        return self.select(itertools.compress(range(len(self)), map(code.__eq__, self._kind_codes)))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __getitem__(self, index: int) -> RosterRow:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('roster index out of range')
+        return RosterRow(self, index)
+
+    def __iter__(self):
+        return (RosterRow(self, index) for index in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} members)"
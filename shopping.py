@@ -0,0 +1,325 @@
+import csv
+import json
+import os
+import time
+
+from collections import Counter
+from collections.abc import MutableSequence
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import NamedTuple
+
+from magical_universe import Potion, ingredient_table, concatenated_ingredient_ids
+
+
+def shopping_list(potions) -> Counter:
+    """ Counts how often each ingredient is needed to brew all potions
+
+    The ingredient ids of all recipes are counted in a single pass over one
+    array, names are only looked up once per distinct ingredient.
+    """
+    counts = Counter(concatenated_ingredient_ids(potions))
+    names = ingredient_table.names
+    return Counter({names[ingredient_id]: count for ingredient_id, count in counts.items()})
+
+
+class Progress(NamedTuple):
+    """ How far a streaming shopping list has come """
+    potions: int
+    bytes_read: int
+    seconds: float
+
+    @property
+    def potions_per_second(self) -> float:
+        return self.potions / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes_read / 1e6 / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.potions:,} potions, {self.bytes_read / 1e6:,.1f} MB in {self.seconds:.1f}s "
+                f"({self.potions_per_second:,.0f} potions/s, {self.megabytes_per_second:,.1f} MB/s)")
+
+
+FILE_FORMATS = {
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.csv': 'csv',
+}
+
+
+def file_format_of(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        return FILE_FORMATS[extension]
+    except KeyError:
+        raise ValueError(f"Cannot tell the format of '{path}', pass file_format='jsonl' or 'csv'") from None
+
+
+def _recipes(lines: list, file_format: str):
+    """ Yields the ingredients of every potion in a chunk of raw lines
+
+    JSON Lines files hold one potion per line, either as a list of
+    ingredients or as an object with an 'ingredients' list. CSV files hold
+    one potion per row with one ingredient per cell; quoted cells may span
+    several lines.
+    """
+    if file_format == 'jsonl':
+        for line in lines:
+            if line.strip():
+                potion = json.loads(line)
+                yield potion['ingredients'] if isinstance(potion, dict) else potion
+    elif file_format == 'csv':
+        for row in csv.reader(line.decode('utf-8') for line in lines):
+            yield [cell.strip() for cell in row if cell.strip()]
+    else:
+        raise ValueError(f"Unknown file format '{file_format}'")
+
+
+def count_chunk(lines: list, file_format: str) -> tuple:
+    """ Counts the ingredients of a chunk of raw lines, returns the counts and the number of potions """
+    counts = Counter()
+    potions = 0
+    for ingredients in _recipes(lines, file_format):
+        counts.update(ingredients)
+        potions += 1
+    return counts, potions
+
+
+def read_chunks(path: str, chunk_size: int, file_format: str = 'jsonl'):
+    """ Yields (raw lines, size in bytes) for chunks of about chunk_size lines
+
+    A CSV chunk only ends after a line that leaves an even number of quotes
+    in it, so a quoted cell spanning several lines never gets split between
+    two chunks. Escaped quotes come in pairs and don't change that.
+    """
+    quoted = file_format == 'csv'
+    with open(path, 'rb') as potion_file:
+        chunk = []
+        chunk_bytes = 0
+        open_quote = False
+        for line in potion_file:
+            chunk.append(line)
+            chunk_bytes += len(line)
+            if quoted and line.count(b'"') % 2:
+                open_quote = not open_quote
+            if len(chunk) >= chunk_size and not open_quote:
+                yield chunk, chunk_bytes
+                chunk = []
+                chunk_bytes = 0
+        if chunk:
+            yield chunk, chunk_bytes
+
+
+def stream_shopping_list(path: str, file_format: str = None, chunk_size: int = 50_000, workers: int = None,
+                         progress=None) -> Counter:
+    """ Counts the ingredients of every potion in a JSON Lines or CSV file
+
+    The file is read in chunks that are counted by worker processes and
+    merged as they come back. At most two chunks per worker are in flight,
+    so memory use doesn't grow with the size of the file. progress, if
+    given, is called with a Progress after every merged chunk. workers=1
+    counts everything in this process. Chunks are parsed in the workers;
+    CSV chunks never end inside a quoted cell, so cells may contain newlines.
+    """
+    if file_format is None:
+        file_format = file_format_of(path)
+
+    total = Counter()
+    potions = bytes_read = 0
+    start = time.perf_counter()
+
+    def merge(counts, chunk_potions, chunk_bytes):
+        nonlocal potions, bytes_read
+        total.update(counts)
+        potions += chunk_potions
+        bytes_read += chunk_bytes
+        if progress is not None:
+            progress(Progress(potions, bytes_read, time.perf_counter() - start))
+
+    if workers == 1:
+        for chunk, chunk_bytes in read_chunks(path, chunk_size, file_format):
+            merge(*count_chunk(chunk, file_format), chunk_bytes)
+        return total
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    max_pending = 2 * workers
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for chunk, chunk_bytes in read_chunks(path, chunk_size, file_format):
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(*future.result(), pending.pop(future))
+            pending[executor.submit(count_chunk, chunk, file_format)] = chunk_bytes
+
+        for future in list(pending):
+            merge(*future.result(), pending.pop(future))
+
+    return total
+
+
+class PotionCollection(MutableSequence):
+    """ Creates a list of potions that tells its subscribers about every change
+
+    Subscribers are called as callback(removed, added) with the potion that
+    left and the potion that joined the collection; one of them is None when
+    a potion is only added or only removed.
+    """
+    def __init__(self, potions=()):
+        self._potions = []
+        self._subscribers = []
+        self.extend(potions)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def _notify(self, removed, added):
+        for callback in self._subscribers:
+            callback(removed, added)
+
+    @staticmethod
+    def _check(potion):
+        if not isinstance(potion, Potion):
+            raise TypeError(f"Only potions can be added to a potion collection, not {potion!r}")
+        return potion
+
+    def __getitem__(self, index):
+        return self._potions[index]
+
+    def __setitem__(self, index, potion):
+        if isinstance(index, slice):
+            removed = self._potions[index]
+            added = [self._check(new) for new in potion]
+            self._potions[index] = added
+            for old in removed:
+                self._notify(old, None)
+            for new in added:
+                self._notify(None, new)
+            return
+        old = self._potions[index]
+        self._potions[index] = self._check(potion)
+        self._notify(old, potion)
+
+    def __delitem__(self, index):
+        removed = self._potions[index] if isinstance(index, slice) else [self._potions[index]]
+        del self._potions[index]
+        for old in removed:
+            self._notify(old, None)
+
+    def insert(self, index: int, potion):
+        self._potions.insert(index, self._check(potion))
+        self._notify(None, potion)
+
+    def __len__(self) -> int:
+        return len(self._potions)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._potions})"
+
+
+class Snapshot(NamedTuple):
+    """ The counts of a shopping list at a given version """
+    version: int
+    counts: Counter
+
+
+class ShoppingList:
+    """ Keeps the shopping list of a potion collection up to date
+
+    Every change of the collection only touches the ingredients of the
+    potions involved. Each change bumps the version; changed_since and diff
+    only look at the ingredients changed after a version, so polling a large
+    shopping list stays cheap.
+    """
+    def __init__(self, potions: PotionCollection = None):
+        self._counts = Counter()
+        # Ingredient ids in the order they last changed, with the version of that change
+        self._changed = {}
+        self.version = 0
+        self._potions = potions
+        if potions is not None:
+            self.version += 1
+            for potion in potions:
+                self._update(potion, 1)
+            potions.subscribe(self.potions_changed)
+
+    def _update(self, potion, step: int):
+        counts, changed, version = self._counts, self._changed, self.version
+        for ingredient_id in potion._ids:
+            counts[ingredient_id] += step
+            changed.pop(ingredient_id, None)
+            changed[ingredient_id] = version
+
+    def potions_changed(self, removed, added):
+        self.version += 1
+        if removed is not None:
+            self._update(removed, -1)
+        if added is not None:
+            self._update(added, 1)
+
+    def add(self, potion):
+        self.potions_changed(None, potion)
+
+    def remove(self, potion):
+        self.potions_changed(potion, None)
+
+    def close(self):
+        """ Stops following the potion collection """
+        if self._potions is not None:
+            self._potions.unsubscribe(self.potions_changed)
+            self._potions = None
+
+    def __getitem__(self, ingredient: str) -> int:
+        ingredient_id = ingredient_table.lookup(ingredient)
+        return self._counts[ingredient_id] if ingredient_id is not None else 0
+
+    def counts(self) -> Counter:
+        """ Returns the whole shopping list, like shopping_list() would """
+        names = ingredient_table.names
+        return Counter({names[ingredient_id]: count for ingredient_id, count in self._counts.items() if count})
+
+    def snapshot(self) -> Snapshot:
+        return Snapshot(self.version, self.counts())
+
+    def changed_since(self, version: int) -> dict:
+        """ Returns the current count of every ingredient changed after version
+
+        Ingredients that are no longer needed have a count of 0.
+        """
+        names = ingredient_table.names
+        changed = {}
+        for ingredient_id in reversed(self._changed):
+            if self._changed[ingredient_id] <= version:
+                break
+            changed[names[ingredient_id]] = self._counts[ingredient_id]
+        return changed
+
+    def diff(self, snapshot: Snapshot) -> Counter:
+        """ Returns by how much each ingredient changed since snapshot was taken """
+        return Counter({ingredient: count - snapshot.counts[ingredient]
+                        for ingredient, count in self.changed_since(snapshot.version).items()
+                        if count != snapshot.counts[ingredient]})
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(version={self.version}, {len(self.counts())} ingredients)"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Counts the ingredients of all potions in a file')
+    parser.add_argument('path', help='JSON Lines or CSV file with one potion per line')
+    parser.add_argument('--format', dest='file_format', choices=sorted(set(FILE_FORMATS.values())))
+    parser.add_argument('--chunk-size', type=int, default=50_000)
+    parser.add_argument('--workers', type=int)
+    arguments = parser.parse_args()
+
+    result = stream_shopping_list(arguments.path, arguments.file_format, arguments.chunk_size,
+                                  arguments.workers, progress=print)
+    print(f"Final shopping list: {result}")
@@ -0,0 +1,152 @@
+import bisect
+import inspect
+
+from magical_universe import Spell
+
+DIFFICULTIES = ('Simple', 'Medium', 'Difficult')
+
+
+def difficulty_rank(difficulty: str) -> int:
+    """ Orders difficulties from 'Simple' to 'Difficult', unknown ones come last """
+    try:
+        return DIFFICULTIES.index(difficulty)
+    except ValueError:
+        return len(DIFFICULTIES)
+
+
+def spell_types(base: type = Spell) -> list:
+    """ Returns base and all of its (indirect) subclasses """
+    types = [base]
+    for subclass in base.__subclasses__():
+        types.extend(spell_type for spell_type in spell_types(subclass) if spell_type not in types)
+    return types
+
+
+def factories(spell_type: type) -> list:
+    """ Returns the classmethods of spell_type that create a spell without arguments """
+    found = []
+    for name, attribute in vars(spell_type).items():
+        if not isinstance(attribute, classmethod):
+            continue
+        factory = getattr(spell_type, name)
+        parameters = inspect.signature(factory).parameters.values()
+        if all(parameter.default is not parameter.empty for parameter in parameters):
+            found.append(factory)
+    return found
+
+
+class _SortedIndex:
+    """ Keeps spells sorted by a key, sorting lazily after additions """
+    def __init__(self):
+        self._entries = []
+        self._keys = []
+        self._sorted = True
+
+    def add(self, key, position: int, spell: Spell):
+        # The position keeps spells with equal keys in insertion order
+        self._entries.append((key, position, spell))
+        self._sorted = False
+
+    def _sort(self):
+        if not self._sorted:
+            self._entries.sort(key=lambda entry: entry[:2])
+            self._keys = [entry[0] for entry in self._entries]
+            self._sorted = True
+
+    def up_to(self, key) -> list:
+        self._sort()
+        return [entry[2] for entry in self._entries[:bisect.bisect_right(self._keys, key)]]
+
+    def equal_to(self, key) -> list:
+        self._sort()
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_right(self._keys, key)
+        return [entry[2] for entry in self._entries[start:end]]
+
+
+class SpellCatalog:
+    """ Creates a searchable catalog of spells
+
+    Spells can be looked up by incantation and name in constant time and
+    by type, min_year and difficulty through sorted per-type indexes.
+    """
+    def __init__(self, spells=()):
+        self._positions = {}
+        self._by_incantation = {}
+        self._by_name = {}
+        self._by_type = {}
+        self._by_min_year = {}
+        self._by_difficulty = {}
+
+        for spell in spells:
+            self.add(spell)
+
+    @classmethod
+    def discover(cls) -> 'SpellCatalog':
+        """ Creates a catalog of every spell made by a factory of any Spell subclass """
+        catalog = cls()
+        for spell_type in spell_types():
+            for factory in factories(spell_type):
+                catalog.add(factory())
+        return catalog
+
+    def add(self, spell: Spell):
+        if not isinstance(spell, Spell):
+            raise TypeError(f"Only spells can be added to a catalog, not {spell!r}")
+        if spell in self._positions:
+            return
+
+        position = self._positions[spell] = len(self._positions)
+        spell_type = type(spell)
+        self._by_incantation.setdefault(spell.incantation, []).append(spell)
+        self._by_name.setdefault(spell.name, []).append(spell)
+        self._by_type.setdefault(spell_type, []).append(spell)
+
+        if spell.min_year is not None:
+            self._by_min_year.setdefault(spell_type, _SortedIndex()).add(spell.min_year, position, spell)
+        self._by_difficulty.setdefault(spell_type, _SortedIndex()).add(
+            difficulty_rank(spell.difficulty), position, spell)
+
+    def with_incantation(self, incantation: str) -> list:
+        return list(self._by_incantation.get(incantation, ()))
+
+    def named(self, name: str) -> list:
+        return list(self._by_name.get(name, ()))
+
+    def _types(self, spell_type: type) -> list:
+        return [registered for registered in self._by_type if issubclass(registered, spell_type)]
+
+    def of_type(self, spell_type: type) -> list:
+        """ Returns all spells of the given type, including its subclasses """
+        return [spell for registered in self._types(spell_type) for spell in self._by_type[registered]]
+
+    def learnable_in_year(self, year: int, spell_type: type = Spell) -> list:
+        """ Returns all spells of the given type whose min_year is at most year
+
+        Spells without a min_year (like hexes) are never returned.
+        """
+        return [spell for registered in self._types(spell_type) if registered in self._by_min_year
+                for spell in self._by_min_year[registered].up_to(year)]
+
+    def with_difficulty(self, difficulty: str, spell_type: type = Spell) -> list:
+        rank = difficulty_rank(difficulty)
+        return [spell for registered in self._types(spell_type)
+                for spell in self._by_difficulty[registered].equal_to(rank)]
+
+    def at_most_difficulty(self, difficulty: str, spell_type: type = Spell) -> list:
+        """ Returns all spells of the given type that are at most as difficult as difficulty """
+        rank = difficulty_rank(difficulty)
+        return [spell for registered in self._types(spell_type)
+                for spell in self._by_difficulty[registered].up_to(rank)]
+
+    def __contains__(self, spell) -> bool:
+        return spell in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} spells)"
@@ -1,5 +1,5 @@
 import pytest
-from magical_universe import Spell, Charm, Transfiguration, Hex, Curse, Jinx, HealingSpell, CounterSpell
+from magical_universe import counter_spells, CounterSpellIndex, Spell, Charm, Transfiguration, Hex, Curse, Jinx, HealingSpell, CounterSpell
 
 @pytest.fixture
 def stuporus_ratiato():
@@ -170,3 +170,51 @@ def test_repr_output_healing_spell(capfd, porim_perfite):
 def test_healing_spell_defining_feature(porim_perfite):
     assert porim_perfite.defining_feature == "Improves the condition of a living object"
 
+
+def test_factories_return_shared_instances():
+    assert Charm.stuporus_ratiato() is Charm.stuporus_ratiato()
+
+def test_spells_with_equal_arguments_are_interned():
+    assert Charm('The Liberula charm', 'Liberula', 'Allows a person to breath under water',
+                 difficulty='Difficult', min_year=5) is Charm.liberula()
+
+def test_spells_of_different_types_are_not_equal():
+    assert Jinx('Same', 'Same', 'Same') != Charm('Same', 'Same', 'Same')
+
+def test_value_based_hashing(stuporus_ratiato, inceptotis):
+    assert {stuporus_ratiato, Charm.stuporus_ratiato(), inceptotis} == {stuporus_ratiato, inceptotis}
+
+def test_spells_are_immutable(stuporus_ratiato):
+    with pytest.raises(AttributeError):
+        stuporus_ratiato.min_year = 3
+    with pytest.raises(AttributeError):
+        del stuporus_ratiato.effect
+
+def test_pickled_spells_stay_interned(rectaro):
+    import pickle
+    assert pickle.loads(pickle.dumps(rectaro)) is rectaro
+
+def test_counter_spell_neutralises(mufindo_immolim):
+    assert mufindo_immolim.neutralises == {Hex.immolim()}
+
+def test_spell_countered_by(mufindo_immolim, rectaro):
+    assert Hex.immolim().countered_by == {mufindo_immolim}
+    assert rectaro.countered_by == frozenset()
+
+def test_register_counter_spell():
+    index = CounterSpellIndex()
+    counter_spell = CounterSpell('The Rectaro counter spell', 'Retro Rectaro', 'Puts arms and legs back')
+    index.register(counter_spell, Hex.rectaro(), Jinx.inceptotis())
+    assert index.neutralises(counter_spell, Hex.rectaro())
+    assert index.neutralised_by(counter_spell) == {Hex.rectaro(), Jinx.inceptotis()}
+    assert index.counters_of(Jinx.inceptotis()) == {counter_spell}
+    assert Hex.rectaro().countered_by == frozenset()
+
+def test_register_requires_counter_spell(rectaro, inceptotis):
+    with pytest.raises(TypeError):
+        CounterSpellIndex().register(rectaro, inceptotis)
+
+def test_module_wide_counter_spell_index():
+    assert CounterSpell.mufindo_immolim() in counter_spells.counters_of(Hex.immolim())
+    assert counter_spells.neutralises(CounterSpell.mufindo_immolim(), Hex.immolim())
+    assert not counter_spells.neutralises(CounterSpell.mufindo_immolim(), Hex.rectaro())
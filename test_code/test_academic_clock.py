@@ -0,0 +1,60 @@
+import pytest
+import datetime
+import magical_universe
+from magical_universe import AcademicClock, CastleKilmereMember, Pupil, Department, Professor, use_clock
+
+now = datetime.datetime.now().year
+
+@pytest.fixture
+def clock():
+    clock = AcademicClock()
+    previous = use_clock(clock)
+    yield clock
+    use_clock(previous)
+
+@pytest.fixture
+def luke():
+    return Pupil.luke()
+
+def test_year(clock):
+    assert clock.year == now
+
+def test_year_is_cached(clock, monkeypatch):
+    clock.year
+    monkeypatch.setattr(magical_universe.datetime, 'datetime', None)
+    assert clock.year == now
+
+def test_year_is_read_again_after_ttl(monkeypatch):
+    clock = AcademicClock(ttl=0)
+    clock.year
+    monkeypatch.setattr(magical_universe.datetime, 'datetime', None)
+    with pytest.raises(AttributeError):
+        clock.year
+
+def test_advance(clock, luke):
+    clock.advance(3)
+    assert clock.year == now + 3
+    assert luke.current_year == now + 3 - luke.start_year + 1
+
+def test_frozen(clock, luke):
+    with clock.frozen(2023):
+        assert luke.current_year == 4
+        assert CastleKilmereMember.school_headmistress().age == 2023 - 1963
+        clock.advance()
+        assert luke.current_year == 5
+    assert clock.year == now
+
+def test_department_current_age(clock):
+    department = Department('Department of Law', Professor.briddle(), 2000)
+    with clock.frozen(2020):
+        assert department.current_age() == 21
+
+def test_use_clock_accepts_any_object_with_a_year(clock):
+    class Calendar:
+        year = 1999
+
+    previous = use_clock(Calendar())
+    try:
+        assert CastleKilmereMember.school_headmistress().age == 36
+    finally:
+        use_clock(previous)
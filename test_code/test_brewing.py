@@ -0,0 +1,56 @@
+import pytest
+from collections import Counter
+from magical_universe import Potion
+from brewing import BrewPlan, plan_brewing
+
+@pytest.fixture
+def recipes():
+    flask_of_remembrance = Potion(['raven eggshells', 'tincture of thyme', 'unicorn tears'])
+    brew_of_lies = Potion(['horned flies', 'leeches', 'horned flies', 'unicorn tears'])
+    sleeping_draught = Potion(['leeches', 'lavender sprig'])
+    return [flask_of_remembrance, brew_of_lies, sleeping_draught]
+
+def used(plan):
+    needed = Counter()
+    for potion, times in plan.brews.items():
+        for ingredient in potion:
+            needed[ingredient] += times
+    return needed
+
+def test_plan_respects_stock(recipes):
+    inventory = {'raven eggshells': 3, 'tincture of thyme': 2, 'unicorn tears': 4,
+                 'horned flies': 5, 'leeches': 3, 'lavender sprig': 1, 'dragon scales': 7}
+    plan = plan_brewing(inventory, recipes)
+    assert isinstance(plan, BrewPlan)
+    needed = used(plan)
+    assert all(needed[ingredient] <= inventory[ingredient] for ingredient in needed)
+    assert plan.leftover == Counter(inventory) - needed
+    assert plan.potions == plan.value == 5
+
+def test_plan_without_stock(recipes):
+    plan = plan_brewing({'leeches': 10}, recipes)
+    assert plan.brews == {}
+    assert plan.value == 0
+    assert plan.leftover == Counter({'leeches': 10})
+
+def test_local_search_improves_greedy_plan():
+    first = Potion(['a', 'a', 'c'])
+    second = Potion(['b', 'c'])
+    third = Potion(['a', 'b', 'b'])
+    inventory = {'a': 3, 'b': 4, 'c': 4}
+    values = {first: 3, second: 1, third: 3}
+    greedy = plan_brewing(inventory, [first, second, third], values, rounds=0)
+    improved = plan_brewing(inventory, [first, second, third], values)
+    assert greedy.value == 6
+    assert improved.value == 8
+    assert improved.brews == {first: 1, second: 2, third: 1}
+
+def test_values_skip_worthless_potions(recipes):
+    inventory = {'leeches': 2, 'lavender sprig': 2, 'horned flies': 2, 'unicorn tears': 2}
+    plan = plan_brewing(inventory, recipes, values={recipes[1]: 5})
+    assert plan.brews == {recipes[1]: 1}
+    assert plan.value == 5
+
+def test_only_potions_can_be_brewed():
+    with pytest.raises(TypeError):
+        plan_brewing({'leeches': 1}, [['leeches']])
@@ -1,5 +1,5 @@
 import pytest
-from magical_universe import CastleKilmereMember
+from magical_universe import CastleKilmereMember, Ghost, trait_registry, ages
 import datetime
 
 now = datetime.datetime.now().year
@@ -36,6 +36,19 @@ def test_exhibit_traits(bromley_with_traits):
     assert bromley_with_traits.exhibits_trait('mean') == False
     assert bromley_with_traits.exhibits_trait('smart') == False
 
+def test_exhibit_trait_lookup_does_not_register_traits(bromley):
+    registered = len(trait_registry)
+    assert bromley.exhibits_trait('never seen before') == False
+    assert len(trait_registry) == registered
+    assert bromley._traits == {}
+
+def test_overwrite_trait(bromley_with_traits):
+    bromley_with_traits.add_trait('kind', False)
+    bromley_with_traits.add_trait('mean')
+    assert bromley_with_traits._traits == {'kind': False, 'wild': True, 'mean': True}
+    assert bromley_with_traits.exhibits_trait('kind') == False
+    assert bromley_with_traits.exhibits_trait('mean') == True
+
 def test_print_traits(capfd, bromley_with_traits):
     bromley_with_traits.print_traits()
     stdout, err = capfd.readouterr()
@@ -61,3 +74,18 @@ def test_repr_output(capfd, bromley):
     stdout = stdout.strip()
     assert stdout == "CastleKilmereMember(name='Bromley Huckabee', birthyear=1956, sex='male')"
 
+
+def test_ages(bromley):
+    members = [bromley, CastleKilmereMember.school_headmistress(), Ghost.mocking_knight()]
+    assert list(ages(members)) == [member.age for member in members]
+
+def test_print_traits_keeps_own_order(capfd, bromley):
+    other = CastleKilmereMember('Miranda Mirren', 1963, 'female')
+    other.add_trait('zz patient')
+    bromley.add_trait('zz curious')
+    bromley.add_trait('zz patient')
+    bromley.add_trait('zz curious', False)
+    bromley.print_traits()
+    stdout, err = capfd.readouterr()
+    assert stdout == 'Bromley Huckabee is zz patient.\nBromley Huckabee is not zz curious.\n'
+    assert list(bromley._traits) == ['zz curious', 'zz patient']
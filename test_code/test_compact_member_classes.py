@@ -0,0 +1,61 @@
+import pytest
+import datetime
+from magical_universe import (Pupil, Professor, Ghost, CompactCastleKilmereMember,
+                              CompactPupil, CompactProfessor, CompactGhost, Charm)
+
+now = datetime.datetime.now().year
+
+@pytest.fixture
+def bromley():
+    return CompactCastleKilmereMember('Bromley Huckabee', 1956, 'male')
+
+@pytest.fixture
+def luke():
+    return CompactPupil.luke()
+
+def test_instances_have_no_dict(bromley, luke):
+    assert not hasattr(bromley, '__dict__')
+    assert not hasattr(luke, '__dict__')
+    with pytest.raises(AttributeError):
+        bromley.nickname = 'Brom'
+
+def test_says(bromley):
+    assert bromley.says("Hi Lissy!") == "Bromley Huckabee says: Hi Lissy!"
+
+def test_age_property(bromley):
+    assert bromley.age == (now - bromley.birthyear)
+
+def test_traits(bromley):
+    bromley.add_trait('kind')
+    assert bromley.exhibits_trait('kind') == True
+    assert bromley.exhibits_trait('mean') == False
+
+def test_factories_create_compact_members(luke):
+    assert isinstance(luke, CompactPupil)
+    assert isinstance(CompactProfessor.briddle(), CompactProfessor)
+    assert isinstance(CompactGhost.mocking_knight(), CompactGhost)
+
+def test_pupil_attributes(luke):
+    assert luke.pet_name == 'Cotton'
+    assert luke.pet_type == 'owl'
+    assert luke.current_year == (now - luke.start_year + 1)
+    assert CompactPupil.passed('Excellent') == True
+
+def test_pupil_without_pet_has_no_pet_name():
+    with pytest.raises(AttributeError):
+        CompactPupil('Adrien Fulford', 2008, 'male', 2020).pet_name
+
+def test_elms(luke):
+    luke.elms = ('Charms', 'E')
+    assert luke.elms['Charms'] == True
+
+def test_learn_spell(luke):
+    spell = Charm.stuporus_ratiato()
+    luke.learn_spell(spell)
+    assert spell in luke.known_spells
+    assert luke.cast_spell(spell) == 'Luke Bery: Stuporus Ratiato!'
+
+def test_repr_output(luke):
+    assert repr(luke) == repr(Pupil.luke()).replace('Pupil', 'CompactPupil')
+    assert repr(CompactProfessor.briddle()) == repr(Professor.briddle()).replace('Professor', 'CompactProfessor')
+    assert repr(CompactGhost.mocking_knight()) == repr(Ghost.mocking_knight()).replace('Ghost', 'CompactGhost')
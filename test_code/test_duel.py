@@ -0,0 +1,55 @@
+import pytest
+import random
+from magical_universe import Pupil, DarkArmyMember, Charm, Hex, Curse, CounterSpell, HealingSpell
+from duel import Duelist, DuelStats, duel, simulate, FIRST, SECOND, DRAW
+
+@pytest.fixture
+def lissy():
+    lissy = Pupil.lissy()
+    lissy.add_trait('highly intelligent')
+    lissy.learn_spells([Charm.stuporus_ratiato(), CounterSpell.mufindo_immolim(),
+                        HealingSpell.porim_perfite(), Curse.fiera_satanotis()])
+    return Duelist.from_pupil(lissy)
+
+@pytest.fixture
+def keres_fulford():
+    return Duelist.from_dark_army_member(DarkArmyMember('Keres Fulford', 1953))
+
+def test_pupils_only_duel_with_spells_they_may_cast(lissy):
+    assert Curse.fiera_satanotis() not in lissy.spells
+    assert len(lissy.spells) == 3
+
+def test_counter_spell_neutralises_spell():
+    caster = Duelist('Caster', (Hex.immolim(),))
+    counterer = Duelist('Counterer', (CounterSpell.mufindo_immolim(),))
+    assert duel(caster, counterer, random.Random(0)) == DRAW
+
+def test_stronger_spell_wins():
+    strong = Duelist('Strong', (Curse.fiera_satanotis(),))
+    weak = Duelist('Weak', (Charm.stuporus_ratiato(),))
+    assert duel(strong, weak, random.Random(0)) == FIRST
+    assert duel(weak, strong, random.Random(0)) == SECOND
+
+def test_stats_merge():
+    assert DuelStats(1, 2, 3).merge(DuelStats(4, 5, 6)) == DuelStats(5, 7, 9)
+    assert DuelStats(1, 2, 1).first_win_rate == 0.25
+
+@pytest.fixture
+def lissy_against_equal(lissy):
+    return lissy, Duelist('Lissy\'s twin', lissy.spells)
+
+def test_simulate_is_reproducible(lissy_against_equal):
+    lissy, twin = lissy_against_equal
+    stats = simulate(lissy, twin, duels=2_000, seed=7, workers=1, chunk_size=500)
+    assert stats.duels == 2_000
+    assert 0 < stats.first_wins < 2_000
+    assert stats == simulate(lissy, twin, duels=2_000, seed=7, workers=1, chunk_size=500)
+    assert stats != simulate(lissy, twin, duels=2_000, seed=8, workers=1, chunk_size=500)
+
+def test_simulate_does_not_depend_on_number_of_workers(lissy_against_equal):
+    lissy, twin = lissy_against_equal
+    in_process = simulate(lissy, twin, duels=2_000, seed=7, workers=1, chunk_size=500)
+    assert simulate(lissy, twin, duels=2_000, seed=7, workers=2, chunk_size=500) == in_process
+
+def test_pupil_without_spells_loses(keres_fulford):
+    assert duel(Duelist('Adrien Fulford', ()), keres_fulford, random.Random(0)) == SECOND
@@ -0,0 +1,101 @@
+import pytest
+from magical_universe import academic_clock, Pupil, Charm, Transfiguration, Hex, Curse, SpellOutcome
+from eligibility import EligibilityMatrix, bitset, members_of, enroll
+
+@pytest.fixture
+def pupils():
+    luke = Pupil.luke()
+    lissy = Pupil.lissy()
+    lissy.add_trait('highly intelligent')
+    adrien = Pupil.adrien()
+    adrien.add_trait('evil')
+    freshman = Pupil('Fiona Fresh', 2012, 'female', 2023)
+    return [luke, lissy, adrien, freshman]
+
+@pytest.fixture
+def spells():
+    return [Charm.stuporus_ratiato(), Charm.liberula(), Transfiguration.alteraror_canieo(),
+            Hex.rectaro(), Curse.fiera_satanotis()]
+
+@pytest.fixture
+def matrix(pupils, spells):
+    return EligibilityMatrix(pupils, spells)
+
+def test_bitset_helpers():
+    assert bitset([0, 3, 9], 10) == 0b1000001001
+    assert members_of(0b101, ['a', 'b', 'c']) == ['a', 'c']
+
+def test_matches_learn_spell(matrix, pupils, spells):
+    with academic_clock.frozen(2024):
+        for pupil in pupils:
+            for spell in spells:
+                expected = pupil.try_learn_spell(spell) is SpellOutcome.LEARNED
+                assert matrix.is_eligible(pupil, spell) == expected
+
+def test_pupils_for(matrix, pupils):
+    luke, lissy, adrien, freshman = pupils
+    with academic_clock.frozen(2024):
+        assert matrix.pupils_for(Charm.liberula()) == [luke, lissy, adrien]
+        assert matrix.pupils_for(Hex.rectaro()) == [adrien]
+        assert matrix.count(Charm.stuporus_ratiato()) == 4
+
+def test_spells_for(matrix, pupils):
+    with academic_clock.frozen(2021):
+        assert matrix.spells_for(pupils[0]) == [Charm.stuporus_ratiato(), Transfiguration.alteraror_canieo()]
+
+def test_rows_follow_the_clock(matrix, pupils):
+    with academic_clock.frozen(2021):
+        assert not matrix.is_eligible(pupils[0], Charm.liberula())
+        academic_clock.advance(3)
+        assert matrix.is_eligible(pupils[0], Charm.liberula())
+
+def test_update_pupil(matrix, pupils):
+    luke = pupils[0]
+    with academic_clock.frozen(2021):
+        assert not matrix.is_eligible(luke, Hex.rectaro())
+        luke.add_trait('evil')
+        luke.add_trait('highly intelligent')
+        matrix.update_pupil(luke)
+        assert matrix.is_eligible(luke, Hex.rectaro())
+        assert matrix.is_eligible(luke, Curse.fiera_satanotis())
+
+def test_update_pupil_start_year(matrix, pupils):
+    freshman = pupils[3]
+    with academic_clock.frozen(2023):
+        assert not matrix.is_eligible(freshman, Transfiguration.alteraror_canieo())
+        freshman.start_year = 2018
+        matrix.update_pupil(freshman)
+        assert matrix.is_eligible(freshman, Transfiguration.alteraror_canieo())
+
+def test_enroll(pupils, spells):
+    luke, lissy, adrien, freshman = pupils
+    with academic_clock.frozen(2021):
+        enrollment = enroll(pupils, spells)
+    assert luke.known_spells == {Charm.stuporus_ratiato(), Transfiguration.alteraror_canieo()}
+    assert lissy.known_spells == {Charm.stuporus_ratiato(), Charm.liberula(),
+                                  Transfiguration.alteraror_canieo(), Curse.fiera_satanotis()}
+    assert Hex.rectaro() in adrien.known_spells
+    assert freshman.known_spells == set()
+    assert enrollment.learned(Charm.liberula()) == [lissy]
+    assert enrollment.rejected(Charm.liberula()) == [luke, adrien, freshman]
+    assert enrollment.counts()[Charm.stuporus_ratiato()] == 3
+
+def test_enroll_matches_learn_spells(pupils, spells):
+    with academic_clock.frozen(2022):
+        expected = [set(pupil.learn_spells(spells).get(SpellOutcome.LEARNED, [])) for pupil in pupils]
+        for pupil in pupils:
+            pupil.known_spells.clear()
+        enroll(pupils, spells)
+    assert [pupil.known_spells for pupil in pupils] == expected
+
+def test_enroll_with_matrix_of_other_pupils_raises_ValueError(matrix, pupils, spells):
+    lissy = Pupil.lissy()
+    with pytest.raises(ValueError):
+        enroll([lissy], spells, matrix)
+    with pytest.raises(ValueError):
+        enroll(pupils, [Charm.liberula()], matrix)
+    assert lissy.known_spells == set()
+
+def test_enroll_reuses_matching_matrix(matrix, pupils, spells):
+    with academic_clock.frozen(2021):
+        assert enroll(pupils, spells, matrix).rows == matrix.rows()
@@ -0,0 +1,150 @@
+import pytest
+from magical_universe import CastleKilmereMember, CompactCastleKilmereMember, Letter
+from letters import LetterArchive, LetterArchiveReader, ArchivedLetter, MAGIC
+
+@pytest.fixture
+def bromley():
+    return CastleKilmereMember('Bromley Huckabee', 1959, 'male')
+
+@pytest.fixture
+def archive(tmp_path):
+    with LetterArchive(str(tmp_path / 'letters.archive'), batch_size=3) as archive:
+        yield archive
+
+def test_write_letter_to_file(bromley, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    total = Letter.total_number_of_letters
+    bromley.write_letter('Lissy', 'Dear Lissy, ...')
+    assert (tmp_path / 'dear_Lissy.txt').read_text() == 'Dear Lissy, ...'
+    assert Letter.total_number_of_letters == total + 1
+
+def test_write_letter_to_archive(bromley, archive, tmp_path):
+    total = Letter.total_number_of_letters
+    bromley.write_letter('Lissy', 'Dear Lissy, ...', archive)
+    bromley.write_letter('Luke', 'Dear Luke, ...', archive)
+    bromley.write_letter('Lissy', 'Dear Lissy, again ...', archive)
+    assert Letter.total_number_of_letters == total + 3
+    assert list(tmp_path.iterdir()) == [tmp_path / 'letters.archive']
+    assert archive.letters_to('Lissy') == ['Dear Lissy, ...', 'Dear Lissy, again ...']
+    assert archive[1] == ArchivedLetter('Luke', 'Dear Luke, ...')
+
+def test_compact_members_write_to_archive(archive):
+    bromley = CompactCastleKilmereMember('Bromley Huckabee', 1959, 'male')
+    bromley.write_letter('Lissy', 'Dear Lissy, ...', archive)
+    assert list(archive) == [ArchivedLetter('Lissy', 'Dear Lissy, ...')]
+
+def test_letter_is_not_archived_after_an_error(archive):
+    total = Letter.total_number_of_letters
+    with pytest.raises(RuntimeError):
+        with Letter('dear_Lissy.txt', archive, 'Lissy') as letter:
+            letter.write('Dear Lissy, ...')
+            raise RuntimeError('The owl flew away')
+    assert len(archive) == 0
+    assert Letter.total_number_of_letters == total
+
+def test_letters_are_written_in_groups(archive, tmp_path):
+    path = tmp_path / 'letters.archive'
+    archive.append('Lissy', 'first')
+    archive.append('Lissy', 'second')
+    assert path.stat().st_size == len(MAGIC)
+    archive.append('Lissy', 'third')
+    assert path.stat().st_size > len(MAGIC)
+    archive.append('Lissy', 'fourth')
+    assert archive[3].content == 'fourth'
+
+def test_reopened_archive_keeps_its_letters(tmp_path):
+    path = str(tmp_path / 'letters.archive')
+    with LetterArchive(path) as archive:
+        archive.append('Lissy', 'Dear Lissy, ...')
+        archive.append('Luke', 'Liebe Grüße, Luke')
+        offsets = archive.offsets
+
+    with LetterArchive(path) as archive:
+        assert archive.offsets == offsets
+        assert archive.recipients() == ['Lissy', 'Luke']
+        assert archive.letters_to('Luke') == ['Liebe Grüße, Luke']
+        assert archive.append('Lissy', 'P.S.') == 2
+
+def test_reopened_archive_drops_cut_off_letter(tmp_path):
+    path = tmp_path / 'letters.archive'
+    with LetterArchive(str(path)) as archive:
+        archive.append('Lissy', 'Dear Lissy, ...')
+        archive.append('Luke', 'Dear Luke, ...')
+    path.write_bytes(path.read_bytes()[:-3])
+
+    with LetterArchive(str(path)) as archive:
+        assert list(archive) == [ArchivedLetter('Lissy', 'Dear Lissy, ...')]
+        archive.append('Luke', 'Dear Luke, ...')
+    with LetterArchive(str(path)) as archive:
+        assert archive[1] == ArchivedLetter('Luke', 'Dear Luke, ...')
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'dear_Lissy.txt'
+    path.write_text('Dear Lissy, ...')
+    with pytest.raises(ValueError):
+        LetterArchive(str(path))
+
+def test_closed_archive_rejects_letters(tmp_path):
+    archive = LetterArchive(str(tmp_path / 'letters.archive'))
+    archive.close()
+    with pytest.raises(ValueError):
+        archive.append('Lissy', 'Dear Lissy, ...')
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = str(tmp_path / 'letters.archive')
+    with LetterArchive(path) as archive:
+        archive.append('Bromley', 'Dear Bromley, ...')
+        archive.append('Lissy', 'Dear Lissy, ...')
+        archive.append('Bromley', 'Lieber Bromley, viele Grüße')
+    return path
+
+def test_reader_random_access(archive_path):
+    with LetterArchiveReader(archive_path) as reader, LetterArchive(archive_path) as archive:
+        assert len(reader) == 3
+        assert reader[2] == ArchivedLetter('Bromley', 'Lieber Bromley, viele Grüße')
+        assert reader[-1] == reader[2]
+        assert reader.content(1) == 'Dear Lissy, ...'
+        assert list(reader) == list(archive)
+
+def test_reader_recipient_index(archive_path):
+    with LetterArchiveReader(archive_path) as reader:
+        assert reader.recipients() == ['Bromley', 'Lissy']
+        assert reader.count_to('Bromley') == 2
+        assert list(reader.letters_to('Bromley')) == ['Dear Bromley, ...', 'Lieber Bromley, viele Grüße']
+        assert list(reader.letters_to('Luke')) == []
+
+def test_reader_views_do_not_copy(archive_path):
+    with LetterArchiveReader(archive_path) as reader:
+        views = reader.views_to('Lissy')
+        assert isinstance(views[0], memoryview)
+        assert views[0].readonly
+        assert views[0] == 'Dear Lissy, ...'.encode('utf-8')
+        for view in views:
+            view.release()
+
+def test_reader_picks_up_new_letters(archive_path):
+    with LetterArchiveReader(archive_path) as reader, LetterArchive(archive_path) as archive:
+        archive.append('Luke', 'Dear Luke, ...')
+        archive.flush()
+        assert len(reader) == 3
+        reader.refresh()
+        assert len(reader) == 4
+        assert reader[3] == ArchivedLetter('Luke', 'Dear Luke, ...')
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / 'dear_Lissy.txt'
+    path.write_text('Dear Lissy, ...')
+    with pytest.raises(ValueError):
+        LetterArchiveReader(str(path))
+    path.write_text('')
+    with pytest.raises(ValueError):
+        LetterArchiveReader(str(path))
+
+def test_append_without_counting(archive):
+    total = Letter.total_number_of_letters
+    archive.append('Lissy', 'Dear Lissy, ...', count=False)
+    assert Letter.total_number_of_letters == total
+    archive.append('Lissy', 'Dear Lissy, again ...')
+    assert Letter.total_number_of_letters == total + 1
+    assert len(archive) == 2
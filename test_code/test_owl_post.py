@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from magical_universe import CastleKilmereMember, Letter
+from letters import LetterArchive, ArchivedLetter
+from owl_post import OwlPost
+
+@pytest.fixture
+def archive(tmp_path):
+    with LetterArchive(str(tmp_path / 'letters.archive'), batch_size=10**6) as archive:
+        yield archive
+
+@pytest.fixture
+def bromley():
+    return CastleKilmereMember('Bromley Huckabee', 1959, 'male')
+
+def test_send_returns_future_with_letter_number(archive):
+    async def deliver():
+        async with OwlPost(archive, batch_size=2) as owl_post:
+            futures = [await owl_post.send(f'Pupil {number}', f'Dear pupil {number}, ...') for number in range(5)]
+            return await asyncio.gather(*futures)
+
+    total = Letter.total_number_of_letters
+    assert asyncio.run(deliver()) == [0, 1, 2, 3, 4]
+    assert Letter.total_number_of_letters == total + 5
+    assert archive[3] == ArchivedLetter('Pupil 3', 'Dear pupil 3, ...')
+
+def test_write_letter_through_owl_post(archive, bromley):
+    async def deliver():
+        async with OwlPost(archive) as owl_post:
+            future = bromley.write_letter('Lissy', 'Dear Lissy, ...', owl_post)
+            assert not future.done()
+            await owl_post.drain()
+            assert future.done()
+            return future.result()
+
+    total = Letter.total_number_of_letters
+    assert asyncio.run(deliver()) == 0
+    assert Letter.total_number_of_letters == total + 1
+    assert archive.letters_to('Lissy') == ['Dear Lissy, ...']
+
+def test_backpressure(archive):
+    async def deliver():
+        async with OwlPost(archive, max_pending=2) as owl_post:
+            owl_post.append('Lissy', 'first')
+            owl_post.append('Lissy', 'second')
+            with pytest.raises(asyncio.QueueFull):
+                owl_post.append('Lissy', 'third')
+            # send() waits until the owl post has picked up letters
+            third = await owl_post.send('Lissy', 'third')
+            return await third
+
+    assert asyncio.run(deliver()) == 2
+    assert archive.letters_to('Lissy') == ['first', 'second', 'third']
+
+def test_close_delivers_pending_letters(archive):
+    async def deliver():
+        owl_post = OwlPost(archive)
+        total = Letter.total_number_of_letters
+        futures = [owl_post.append('Luke', f'Letter {number}') for number in range(100)]
+        await owl_post.close()
+        assert all(future.done() for future in futures)
+        assert Letter.total_number_of_letters == total + 100
+        with pytest.raises(RuntimeError):
+            owl_post.append('Luke', 'Too late')
+
+    asyncio.run(deliver())
+    assert len(archive) == 100
+
+def test_failed_batch_sets_exceptions(archive):
+    async def deliver():
+        async with OwlPost(archive) as owl_post:
+            archive.close()
+            future = owl_post.append('Lissy', 'Dear Lissy, ...')
+            await owl_post.drain()
+            return future
+
+    future = asyncio.run(deliver())
+    with pytest.raises(ValueError):
+        future.result()
+
+def test_rejected_letters_are_not_counted(archive, bromley):
+    async def deliver():
+        async with OwlPost(archive, max_pending=1) as owl_post:
+            total = Letter.total_number_of_letters
+            bromley.write_letter('Lissy', 'first', owl_post)
+            with pytest.raises(asyncio.QueueFull):
+                bromley.write_letter('Lissy', 'second', owl_post)
+            assert Letter.total_number_of_letters == total + 1
+        with pytest.raises(RuntimeError):
+            bromley.write_letter('Lissy', 'third', owl_post)
+        assert Letter.total_number_of_letters == total + 1
+
+    asyncio.run(deliver())
+    assert archive.letters_to('Lissy') == ['first']
@@ -1,5 +1,10 @@
+import os
+import pickle
+import subprocess
+import sys
 import pytest
-from magical_universe import Potion
+import magical_universe
+from magical_universe import Potion, ingredient_table
 
 @pytest.fixture
 def flask_of_remembrance():
@@ -16,3 +21,66 @@ def test_iterator_behavior(flask_of_remembrance):
                                     'dried onions', 'powdered ginger root']
 
 
+def test_potion_can_be_iterated_repeatedly(flask_of_remembrance):
+    assert list(flask_of_remembrance) == list(flask_of_remembrance)
+
+def test_concurrent_iteration(vial_of_anger):
+    pairs = list(zip(vial_of_anger, vial_of_anger))
+    assert pairs == [(ingredient, ingredient) for ingredient in vial_of_anger]
+
+def test_sequence_behavior(vial_of_anger):
+    assert len(vial_of_anger) == 5
+    assert vial_of_anger[1] == 'leeches'
+    assert vial_of_anger[-1] == 'earthworm juice'
+    assert 'horned flies' in vial_of_anger
+    assert 'unicorn tears' not in vial_of_anger
+
+def test_potion_is_immutable(vial_of_anger):
+    with pytest.raises(TypeError):
+        vial_of_anger[0] = 'unicorn tears'
+    with pytest.raises(AttributeError):
+        vial_of_anger.counter = 0
+
+def test_potion_does_not_share_the_passed_list():
+    ingredients = ['leeches', 'dried onions']
+    potion = Potion(ingredients)
+    ingredients.append('unicorn tears')
+    assert list(potion) == ['leeches', 'dried onions']
+
+def test_repr_output(vial_of_anger):
+    assert repr(vial_of_anger) == "Potion(['dried dragon skin', 'leeches', 'shredded elephant tusk', " \
+                                  "'horned flies', 'earthworm juice'])"
+
+def test_potions_with_the_same_recipe_are_equal(vial_of_anger):
+    same = Potion(['dried dragon skin', 'leeches', 'shredded elephant tusk', 'horned flies', 'earthworm juice'])
+    assert same == vial_of_anger
+    assert hash(same) == hash(vial_of_anger)
+    assert Potion(['leeches']) != Potion(['horned flies'])
+
+def test_ingredients_are_stored_as_shared_ids(flask_of_remembrance, vial_of_anger):
+    leeches = ingredient_table.id('leeches')
+    assert vial_of_anger.ingredient_ids[1] == leeches
+    assert list(Potion(['leeches']).ingredient_ids) == [leeches]
+    assert ingredient_table.names[leeches] == 'leeches'
+
+def test_ingredient_ids_are_read_only(vial_of_anger):
+    with pytest.raises(TypeError):
+        vial_of_anger.ingredient_ids[0] = 0
+
+def test_unknown_ingredient_is_not_registered_by_lookups(vial_of_anger):
+    assert 'phoenix feather dust' not in vial_of_anger
+    assert ingredient_table.lookup('phoenix feather dust') is None
+
+def test_slicing(flask_of_remembrance):
+    assert flask_of_remembrance[1:3] == ('tincture of thyme', 'unicorn tears')
+
+def test_pickled_potion_keeps_its_ingredients_in_another_process():
+    potion = Potion(['zz first', 'zz second', 'zz first'])
+    loader = ("import pickle, sys\n"
+              "from magical_universe import Potion\n"
+              "Potion(['padding'] * 3)\n"
+              "print(list(pickle.loads(sys.stdin.buffer.read())))")
+    result = subprocess.run([sys.executable, '-c', loader], input=pickle.dumps(potion), capture_output=True,
+                            cwd=os.path.dirname(os.path.abspath(magical_universe.__file__)), check=True)
+    assert result.stdout.decode().strip() == "['zz first', 'zz second', 'zz first']"
+    assert pickle.loads(pickle.dumps(potion)) == potion
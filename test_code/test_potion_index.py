@@ -0,0 +1,75 @@
+import pytest
+from array import array
+from magical_universe import Potion
+from potion_index import PotionIndex, intersection, union, difference
+
+@pytest.fixture
+def potions():
+    flask_of_remembrance = Potion(['raven eggshells', 'tincture of thyme', 'unicorn tears',
+                                   'dried onions', 'powdered ginger root'])
+    brew_of_lies = Potion(['horned flies', 'leeches', 'drakus flower', 'horned flies',
+                           'unicorn tears', 'cactus juice'])
+    sleeping_draught = Potion(['dried onions', 'lavender', 'leeches'])
+    return [flask_of_remembrance, brew_of_lies, sleeping_draught]
+
+@pytest.fixture
+def index(potions):
+    return PotionIndex(potions)
+
+def brute_force(potions, all_of=(), any_of=(), none_of=()):
+    return [potion_id for potion_id, potion in enumerate(potions)
+            if all(ingredient in potion for ingredient in all_of)
+            and (not any_of or any(ingredient in potion for ingredient in any_of))
+            and not any(ingredient in potion for ingredient in none_of)]
+
+def test_with_ingredient(index):
+    assert list(index.with_ingredient('unicorn tears')) == [0, 1]
+    assert list(index.with_ingredient('horned flies')) == [1]
+    assert list(index.with_ingredient('phoenix feather dust')) == []
+
+@pytest.mark.parametrize('query', [
+    dict(all_of=['unicorn tears', 'leeches']),
+    dict(all_of=['dried onions']),
+    dict(any_of=['lavender', 'horned flies']),
+    dict(none_of=['unicorn tears']),
+    dict(all_of=['leeches'], none_of=['cactus juice']),
+    dict(all_of=['dried onions'], any_of=['lavender', 'raven eggshells'], none_of=['tincture of thyme']),
+    dict(all_of=['phoenix feather dust']),
+    dict(any_of=['phoenix feather dust']),
+    dict(none_of=['phoenix feather dust']),
+])
+def test_query_matches_brute_force(index, potions, query):
+    assert list(index.query(**query)) == brute_force(potions, **query)
+
+def test_add_and_remove(index, potions):
+    calming_brew = Potion(['lavender', 'unicorn tears'])
+    potion_id = index.add(calming_brew)
+    assert potion_id == 3
+    assert list(index.query(all_of=['lavender', 'unicorn tears'])) == [3]
+
+    assert index.remove(1) == potions[1]
+    assert 1 not in index
+    assert len(index) == 3
+    assert list(index.with_ingredient('unicorn tears')) == [0, 3]
+    assert 'horned flies' not in index.ingredients()
+    assert list(index.query(none_of=['lavender'])) == [0]
+
+    with pytest.raises(KeyError):
+        index.remove(1)
+
+def test_ids_are_not_reused(index):
+    index.remove(2)
+    assert index.add(Potion(['lavender'])) == 3
+
+def test_only_potions_can_be_indexed(index):
+    with pytest.raises(TypeError):
+        index.add(['lavender'])
+
+def test_sorted_array_operations():
+    small = array('I', [3, 40])
+    large = array('I', range(0, 100, 2))
+    assert list(intersection(small, large)) == [40]
+    assert list(intersection(large, array('I', range(0, 100, 3)))) == list(range(0, 100, 6))
+    assert list(union([small, array('I', [1, 3])])) == [1, 3, 40]
+    assert list(difference(large[:5], small)) == [0, 2, 4, 6, 8]
+    assert list(difference(small, large)) == [3]
@@ -0,0 +1,73 @@
+import random
+import pytest
+from magical_universe import Potion
+from potion_similarity import MinHasher, SimilarPotionIndex, jaccard
+
+@pytest.fixture
+def potions():
+    flask_of_remembrance = Potion(['raven eggshells', 'tincture of thyme', 'unicorn tears',
+                                   'dried onions', 'powdered ginger root'])
+    vial_of_anger = Potion(['dried dragon skin', 'leeches', 'shredded elephant tusk',
+                            'horned flies', 'earthworm juice', 'dried onions'])
+    ancient_wisdom = Potion(['tincture of thyme', 'leeches', 'drakus flower', 'lavender sprig',
+                             'earthworm juice', 'cactus juice', 'dried onions'])
+    brew_of_lies = Potion(['horned flies', 'leeches', 'drakus flower', 'horned flies',
+                           'unicorn tears', 'cactus juice'])
+    return [flask_of_remembrance, vial_of_anger, ancient_wisdom, brew_of_lies]
+
+def test_jaccard(potions):
+    ancient_wisdom, brew_of_lies = potions[2], potions[3]
+    assert jaccard(ancient_wisdom, brew_of_lies) == 1 / 3
+    assert jaccard(brew_of_lies, brew_of_lies) == 1.0
+    assert jaccard(Potion([]), Potion([])) == 1.0
+
+def test_signature_estimates_jaccard(potions):
+    hasher = MinHasher(num_perm=512)
+    ancient_wisdom, brew_of_lies = potions[2], potions[3]
+    estimate = hasher.estimate(hasher.signature(ancient_wisdom), hasher.signature(brew_of_lies))
+    assert estimate == pytest.approx(1 / 3, abs=0.1)
+    assert hasher.signature(brew_of_lies) == hasher.signature(Potion(reversed(brew_of_lies)))
+
+def test_similar_ranks_exactly(potions):
+    index = SimilarPotionIndex(potions, bands=32, rows=1)
+    matches = index.similar(potions[3], k=2)
+    assert [match.potion_id for match in matches] == [3, 2]
+    assert matches[1].similarity == 1 / 3
+    assert matches[1].potion == potions[2]
+
+def test_similar_respects_min_similarity(potions):
+    index = SimilarPotionIndex(potions, bands=32, rows=1)
+    assert all(match.similarity >= 0.5 for match in index.similar(potions[3], min_similarity=0.5))
+
+def test_finds_near_duplicates_among_many():
+    rng = random.Random(3)
+    names = [f'ingredient {number}' for number in range(500)]
+    potions = [Potion(rng.sample(names, 8)) for _ in range(2000)]
+    index = SimilarPotionIndex(potions)
+    for potion_id in range(0, 2000, 100):
+        near_duplicate = Potion(list(potions[potion_id])[:7] + ['dried onions'])
+        assert index.similar(near_duplicate, k=1)[0].potion_id == potion_id
+    assert len(index.candidates(potions[0])) < len(potions) / 10
+
+def test_remove(potions):
+    index = SimilarPotionIndex(potions, bands=32, rows=1)
+    assert index.remove(2) == potions[2]
+    assert 2 not in index
+    assert 2 not in index.candidates(potions[3])
+    with pytest.raises(KeyError):
+        index.remove(2)
+
+def test_threshold():
+    assert SimilarPotionIndex(bands=16, rows=4).threshold == pytest.approx(0.5)
+
+def test_signature_of_one_ingredient_potions():
+    hasher = MinHasher(num_perm=8)
+    single = hasher.signature(Potion(['lavender sprig']))
+    assert len(single) == 8
+    assert hasher.signature(Potion(['lavender sprig', 'lavender sprig'])) == single
+    assert hasher.estimate(single, hasher.signature(Potion(['lavender sprig', 'leeches']))) < 1
+
+def test_index_one_ingredient_potions():
+    index = SimilarPotionIndex([Potion(['lavender sprig']), Potion(['leeches', 'leeches'])], bands=8, rows=1)
+    match = index.similar(Potion(['leeches']), k=1)[0]
+    assert (match.potion_id, match.similarity) == (1, 1.0)
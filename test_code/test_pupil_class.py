@@ -1,6 +1,6 @@
 import pytest
 import datetime
-from magical_universe import Pupil, Charm, Transfiguration, Hex, Curse, Jinx, HealingSpell, CounterSpell
+from magical_universe import academic_clock, SpellOutcome, Pupil, pupils_with_elms, current_years, Charm, Transfiguration, Hex, Curse, Jinx, HealingSpell, CounterSpell
 
 now = datetime.datetime.now().year
 
@@ -167,7 +167,9 @@ def test_learn_spell_hex_if_not_being_evil(capfd, luke, rectaro):
     assert stdout == 'How dare you study a hex or curse?!'
 
 def test_learn_spell_charm_if_being_too_young(capfd, luke, liberula):
-    luke.learn_spell(liberula)
+    # Luke started in 2020, so he is in his second year in 2021
+    with academic_clock.frozen(2021):
+        luke.learn_spell(liberula)
     stdout, err = capfd.readouterr()
     stdout = stdout.strip()
     assert stdout == "Luke Bery is too young to study this spell!"
@@ -194,3 +196,71 @@ def test_cast_spell_curse(capfd, luke, fiera_satanotis):
 def test_cast_known_spell(capfd, luke, stuporus_ratiato):
     luke.learn_spell(stuporus_ratiato)
     assert luke.cast_spell(stuporus_ratiato) == 'Luke Bery: Stuporus Ratiato!'
+
+def test_set_elms_with_unknown_subject_raises_ValueError(luke):
+    with pytest.raises(ValueError):
+        luke.elms = ("Dragon Taming", "E")
+
+def test_elms_view_is_read_only(luke):
+    with pytest.raises(TypeError):
+        luke.elms['Potions'] = True
+
+def test_pupils_with_elms(luke, lissy, adrien):
+    luke.elms = ("Potions", "E")
+    luke.elms = ("Charms", "E")
+    lissy.elms = ("Potions", "G")
+    assert pupils_with_elms([luke, lissy, adrien], "Potions", "Charms") == [luke]
+    assert pupils_with_elms([luke, lissy, adrien], "Potions") == [luke, lissy]
+
+def test_current_years(luke, lissy):
+    assert list(current_years([luke, lissy])) == [luke.current_year, lissy.current_year]
+
+def test_known_spells_do_not_hold_duplicates(capfd, luke):
+    luke.learn_spell(Charm.stuporus_ratiato())
+    luke.learn_spell(Charm.stuporus_ratiato())
+    assert len(luke.known_spells) == 1
+    assert luke.cast_spell(Charm.stuporus_ratiato()) == 'Luke Bery: Stuporus Ratiato!'
+
+def test_try_learn_spell_is_silent(capfd, luke, stuporus_ratiato, rectaro):
+    assert luke.try_learn_spell(stuporus_ratiato) is SpellOutcome.LEARNED
+    assert luke.try_learn_spell(rectaro) is SpellOutcome.FORBIDDEN
+    stdout, err = capfd.readouterr()
+    assert stdout == ''
+    assert luke.known_spells == {stuporus_ratiato}
+
+def test_learn_spell_returns_outcome(capfd, luke, liberula):
+    with academic_clock.frozen(2021):
+        assert luke.learn_spell(liberula) is SpellOutcome.TOO_YOUNG
+
+def test_try_cast_spell(luke, stuporus_ratiato, fiera_satanotis, rectaro):
+    assert luke.try_cast_spell(stuporus_ratiato) is SpellOutcome.NOT_STUDIED
+    assert luke.try_cast_spell(fiera_satanotis) is SpellOutcome.DARK_MAGIC
+    assert luke.try_cast_spell(rectaro) is SpellOutcome.MEAN
+    luke.try_learn_spell(stuporus_ratiato)
+    assert luke.try_cast_spell(stuporus_ratiato) is SpellOutcome.CAST
+
+def test_cast_unknown_spell(capfd, luke, stuporus_ratiato):
+    assert luke.cast_spell(stuporus_ratiato) is None
+    stdout, err = capfd.readouterr()
+    assert stdout == "You can't cast the The Stuporus Ratiato charm spell correctly  - you have to study it first! \n"
+
+def test_evil_pupil_learns_and_casts_hex(adrien, rectaro):
+    adrien.add_trait('evil')
+    assert adrien.try_learn_spell(rectaro) is SpellOutcome.LEARNED
+    assert adrien.cast_spell(rectaro) == 'Adrien Fulford: Rectaro!'
+
+def test_rules_apply_to_spell_subclasses(luke):
+    class StrongHex(Hex):
+        pass
+
+    assert luke.try_learn_spell(StrongHex('Strong hex', 'Fortis', 'Hurts a lot')) is SpellOutcome.FORBIDDEN
+
+def test_learn_spells(capfd, luke, stuporus_ratiato, liberula, rectaro):
+    with academic_clock.frozen(2021):
+        outcomes = luke.learn_spells([stuporus_ratiato, liberula, rectaro])
+    assert outcomes == {SpellOutcome.LEARNED: [stuporus_ratiato],
+                        SpellOutcome.TOO_YOUNG: [liberula],
+                        SpellOutcome.FORBIDDEN: [rectaro]}
+    assert luke.known_spells == {stuporus_ratiato}
+    stdout, err = capfd.readouterr()
+    assert stdout == ''
@@ -0,0 +1,148 @@
+import pytest
+import datetime
+from magical_universe import academic_clock, CastleKilmereMember, Pupil, Professor, Ghost, Charm, SpellOutcome
+from eligibility import enroll
+from roster import Roster, MISSING
+
+now = datetime.datetime.now().year
+
+@pytest.fixture
+def roster():
+    return Roster([CastleKilmereMember.school_headmistress(),
+                   Pupil.luke(),
+                   Professor.radford(),
+                   Professor.briddle(),
+                   Ghost.mocking_knight()])
+
+def test_length(roster):
+    assert len(roster) == 5
+
+def test_rows_behave_like_members(roster):
+    luke = roster[1]
+    assert isinstance(luke, Pupil)
+    assert luke.name == 'Luke Bery'
+    assert luke.start_year == 2020
+    assert luke.says('Hi!') == 'Luke Bery says: Hi!'
+    assert luke.age == now - 2008
+
+def test_repr_output(roster):
+    assert repr(roster[0]) == "CastleKilmereMember(name='Miranda Mirren', birthyear=1963, sex='female')"
+    assert repr(roster[3]) == repr(Professor.briddle())
+    assert repr(roster[-1]) == repr(Ghost.mocking_knight())
+
+def test_rows_only_expose_their_own_fields(roster):
+    with pytest.raises(AttributeError):
+        roster[0].start_year
+
+def test_born_before(roster):
+    names = [member.name for member in roster.born_before(1960)]
+    assert names == ['Rupert Radford', 'Birdie Briddle', 'The Mocking Knight']
+
+def test_where_skips_rows_without_the_column(roster):
+    assert roster.where('start_year', 2021 .__gt__) == [1]
+
+def test_of_kind(roster):
+    assert [member.subject for member in roster.of_kind(Professor)] == ['Illusions 101', 'Foreign Magical Systems']
+
+def test_add_without_member_object():
+    roster = Roster()
+    ghost = roster.add(Ghost, 'The Gray Groom', 1000, 'male', year_of_death=1050)
+    assert ghost.year_of_death == 1050
+
+def test_add_unknown_field_raises_exception():
+    with pytest.raises(TypeError):
+        Roster().add(Pupil, 'Luke Bery', 2008, 'male', subject='Potions')
+
+def test_rows_expose_elms():
+    luke = Pupil.luke()
+    luke.elms = ('Potions', 'E')
+    row = Roster([luke])[0]
+    assert row.elms['Potions'] == True
+    assert row.elms['Charms'] == False
+
+def test_with_elms(roster):
+    lissy = Pupil.lissy()
+    lissy.elms = ('Potions', 'E')
+    lissy.elms = ('Charms', 'G')
+    adrien = Pupil.adrien()
+    adrien.elms = ('Potions', 'A')
+    roster.append(lissy)
+    roster.append(adrien)
+    assert [pupil.name for pupil in roster.with_elms('Potions', 'Charms')] == ['Lissy Spinster']
+    assert [pupil.name for pupil in roster.with_elms('Potions')] == ['Lissy Spinster', 'Adrien Fulford']
+
+def test_ages(roster):
+    assert list(roster.ages()) == [member.age for member in roster]
+
+def test_current_years(roster):
+    assert list(roster.current_years()) == [MISSING, now - 2020 + 1, MISSING, MISSING, MISSING]
+
+def test_rows_are_equal_per_member(roster):
+    assert roster[1] == roster[1]
+    assert roster[1] != roster[2]
+    assert len({roster[1], roster[1], roster[-4]}) == 1
+    assert roster[1] != Roster([Pupil.luke()])[0]
+
+def test_rows_keep_traits():
+    lissy = Pupil.lissy()
+    lissy.add_trait('highly intelligent')
+    roster = Roster([lissy, Pupil.luke()])
+    assert roster[0].exhibits_trait('highly intelligent')
+    luke = roster[1]
+    assert not luke.exhibits_trait('kind')
+    luke.add_trait('kind')
+    luke.add_trait('mean', False)
+    assert roster[1].exhibits_trait('kind')
+    assert roster[1]._traits == {'kind': True, 'mean': False}
+
+def test_rows_learn_spells(capfd):
+    roster = Roster([Pupil.luke()])
+    luke = roster[0]
+    assert luke.try_learn_spell(Charm.stuporus_ratiato()) is SpellOutcome.LEARNED
+    assert roster[0].known_spells == {Charm.stuporus_ratiato()}
+    assert luke.cast_spell(Charm.stuporus_ratiato()) == 'Luke Bery: Stuporus Ratiato!'
+
+def test_rows_in_eligibility_matrix():
+    lissy = Pupil.lissy()
+    lissy.add_trait('highly intelligent')
+    roster = Roster([lissy, Pupil.luke()])
+    liberula = Charm.liberula()
+    with academic_clock.frozen(2021):
+        enrollment = enroll(roster.of_kind(Pupil), [liberula])
+    assert enrollment.learned(liberula) == [roster[0]]
+    assert liberula in roster[0].known_spells
+    assert roster[1].known_spells == set()
+
+def test_rows_only_set_stored_fields(roster):
+    with pytest.raises(AttributeError):
+        roster[1].name = 'Luke'
+    with pytest.raises(AttributeError):
+        roster[0].start_year = 2020
+
+def test_rows_award_elms(capfd):
+    roster = Roster([Pupil.luke()])
+    luke = roster[0]
+    luke.elms = ('Potions', 'E')
+    luke.elms = ('Charms', 'P')
+    assert roster[0].elms['Potions'] == True
+    assert roster[0].elms['Charms'] == False
+    assert [pupil.name for pupil in roster.with_elms('Potions')] == ['Luke Bery']
+    stdout, err = capfd.readouterr()
+    assert stdout == 'The exam was not passed so no ELM was awarded!\n'
+
+def test_rows_keep_pets():
+    roster = Roster([Pupil.luke(), Pupil('Sam Smith', 2008, 'male', 2020)])
+    assert (roster[0].pet_name, roster[0].pet_type) == ('Cotton', 'owl')
+    with pytest.raises(AttributeError):
+        roster[1].pet_name
+    roster[1].pet_name = 'Ramses'
+    assert roster[1].pet_name == 'Ramses'
+
+def test_rows_befriend(capfd):
+    roster = Roster([Pupil.luke(), Pupil.lissy()])
+    luke = roster[0]
+    luke.befriend(roster[1])
+    assert roster[0].friends == "Luke Bery's current friends are: ['Lissy Spinster']"
+    assert roster[1].friends == "Lissy Spinster's current friends are: []"
+    stdout, err = capfd.readouterr()
+    assert stdout == 'Lissy Spinster is now your friend!\n'
@@ -0,0 +1,122 @@
+import json
+import pytest
+from collections import Counter
+from magical_universe import Potion
+from shopping import PotionCollection, Progress, ShoppingList, shopping_list, stream_shopping_list, read_chunks
+
+@pytest.fixture
+def potions():
+    flask_of_remembrance = Potion(['raven eggshells', 'tincture of thyme', 'unicorn tears',
+                                   'dried onions', 'powdered ginger root'])
+    brew_of_lies = Potion(['horned flies', 'leeches', 'drakus flower', 'horned flies',
+                           'unicorn tears', 'cactus juice'])
+    return [flask_of_remembrance, brew_of_lies]
+
+def test_shopping_list(potions):
+    expected = Counter()
+    for potion in potions:
+        for ingredient in potion:
+            expected[ingredient] += 1
+    assert shopping_list(potions) == expected
+
+def test_shopping_list_is_a_counter(potions):
+    result = shopping_list(potions)
+    assert isinstance(result, Counter)
+    assert result['horned flies'] == 2
+    assert result['phoenix feather dust'] == 0
+
+def test_shopping_list_without_potions():
+    assert shopping_list([]) == Counter()
+
+@pytest.fixture
+def potion_file(tmp_path, potions):
+    path = tmp_path / 'potions.jsonl'
+    lines = [json.dumps(list(potion)) for potion in potions]
+    lines.append(json.dumps({'name': 'Brew of lies', 'ingredients': list(potions[1])}))
+    path.write_text('\n'.join(lines) + '\n')
+    return path
+
+def test_stream_shopping_list_jsonl(potion_file, potions):
+    expected = shopping_list(potions + [potions[1]])
+    assert stream_shopping_list(str(potion_file), workers=1) == expected
+    assert stream_shopping_list(str(potion_file), chunk_size=1, workers=2) == expected
+
+def test_stream_shopping_list_csv(tmp_path, potions):
+    path = tmp_path / 'potions.csv'
+    path.write_text('\n'.join(', '.join(potion) for potion in potions) + '\n')
+    assert stream_shopping_list(str(path), workers=1) == shopping_list(potions)
+
+def test_stream_shopping_list_reports_progress(potion_file):
+    reports = []
+    stream_shopping_list(str(potion_file), chunk_size=2, workers=1, progress=reports.append)
+    assert [report.potions for report in reports] == [2, 3]
+    assert reports[-1].bytes_read == potion_file.stat().st_size
+    assert isinstance(reports[-1], Progress)
+
+def test_stream_shopping_list_unknown_format(tmp_path):
+    path = tmp_path / 'potions.txt'
+    path.write_text('')
+    with pytest.raises(ValueError):
+        stream_shopping_list(str(path))
+    assert stream_shopping_list(str(path), file_format='csv', workers=1) == Counter()
+
+@pytest.fixture
+def collection(potions):
+    return PotionCollection(potions)
+
+def test_shopping_list_follows_collection(collection, potions):
+    shopping = ShoppingList(collection)
+    assert shopping.counts() == shopping_list(potions)
+
+    sleeping_draught = Potion(['lavender', 'leeches'])
+    collection.append(sleeping_draught)
+    assert shopping['leeches'] == 2
+    assert shopping['lavender'] == 1
+
+    collection[0] = Potion(['lavender'])
+    assert shopping['raven eggshells'] == 0
+    assert shopping['lavender'] == 2
+
+    del collection[1]
+    collection[1:] = [potions[1], potions[1]]
+    assert shopping.counts() == shopping_list(collection)
+
+def test_shopping_list_diff(collection):
+    shopping = ShoppingList(collection)
+    before = shopping.snapshot()
+    collection.append(Potion(['lavender', 'unicorn tears']))
+    collection.remove(collection[1])
+    assert shopping.version == before.version + 2
+    assert shopping.changed_since(before.version) == {
+        'lavender': 1, 'unicorn tears': 2, 'horned flies': 0, 'leeches': 0, 'drakus flower': 0, 'cactus juice': 0}
+    assert shopping.diff(before) == Counter({'lavender': 1, 'horned flies': -2,
+                                             'leeches': -1, 'drakus flower': -1, 'cactus juice': -1})
+    assert shopping.changed_since(shopping.version) == {}
+    assert shopping.diff(shopping.snapshot()) == Counter()
+
+def test_shopping_list_close(collection):
+    shopping = ShoppingList(collection)
+    shopping.close()
+    collection.append(Potion(['lavender']))
+    assert shopping['lavender'] == 0
+
+def test_potion_collection_only_holds_potions(collection):
+    with pytest.raises(TypeError):
+        collection.append(['lavender'])
+
+def test_stream_shopping_list_csv_with_quoted_newlines(tmp_path):
+    path = tmp_path / 'potions.csv'
+    path.write_text('leeches,"dried\nonions",lavender\nleeches,unicorn tears\n')
+    expected = Counter({'leeches': 2, 'dried\nonions': 1, 'lavender': 1, 'unicorn tears': 1})
+    reports = []
+    for chunk_size in (1, 2, 50_000):
+        assert stream_shopping_list(str(path), chunk_size=chunk_size, workers=1, progress=reports.append) == expected
+        assert reports[-1].potions == 2
+        assert reports[-1].bytes_read == path.stat().st_size
+    assert stream_shopping_list(str(path), chunk_size=1, workers=2) == expected
+
+def test_read_chunks_keep_quoted_cells_together(tmp_path):
+    path = tmp_path / 'potions.csv'
+    path.write_bytes(b'"the ""first""\nleech",lavender\nleeches\n"dried\n\nonions"\n')
+    chunks = [lines for lines, _ in read_chunks(str(path), 1, 'csv')]
+    assert chunks == [[b'"the ""first""\n', b'leech",lavender\n'], [b'leeches\n'], [b'"dried\n', b'\n', b'onions"\n']]
@@ -0,0 +1,55 @@
+import pytest
+from magical_universe import (Pupil, DarkArmyMember, Charm, Hex, Curse, SpellOutcome,
+                              CastResult, cast_many, cast_batch)
+
+@pytest.fixture
+def luke():
+    luke = Pupil.luke()
+    luke.try_learn_spell(Charm.stuporus_ratiato())
+    return luke
+
+@pytest.fixture
+def keres_fulford():
+    return DarkArmyMember("Keres Fulford", 1953)
+
+def test_cast_many(capfd, luke):
+    stuporus_ratiato = Charm.stuporus_ratiato()
+    results = cast_many(luke, [stuporus_ratiato, Curse.fiera_satanotis(), stuporus_ratiato])
+    assert results == [CastResult(SpellOutcome.CAST, 0, stuporus_ratiato.spell_id),
+                       CastResult(SpellOutcome.DARK_MAGIC, 0, Curse.fiera_satanotis().spell_id),
+                       CastResult(SpellOutcome.CAST, 0, stuporus_ratiato.spell_id)]
+    stdout, err = capfd.readouterr()
+    assert stdout == ''
+
+def test_dark_army_members_cast_anything(keres_fulford):
+    assert [result.status for result in cast_many(keres_fulford, [Hex.rectaro(), Curse.fiera_satanotis()])] == \
+        [SpellOutcome.CAST, SpellOutcome.CAST]
+
+def test_cast_batch(luke, keres_fulford):
+    rectaro = Hex.rectaro()
+    pairs = [(luke, rectaro), (keres_fulford, rectaro), (luke, Charm.liberula())]
+    batch = cast_batch(pairs)
+    assert [(result.status, result.caster_id) for result in batch.results] == [
+        (SpellOutcome.MEAN, 0),
+        (SpellOutcome.CAST, 1),
+        (SpellOutcome.NOT_STUDIED, 0)]
+    assert batch.casters == [luke, keres_fulford]
+    assert batch.caster(batch.results[2]) is luke
+
+def test_cast_batch_tells_apart_casters_with_the_same_name():
+    first, second = Pupil('Sam Smith', 2008, 'male', 2020), Pupil('Sam Smith', 2008, 'male', 2020)
+    second.try_learn_spell(Charm.stuporus_ratiato())
+    pairs = [(first, Charm.stuporus_ratiato()), (second, Charm.stuporus_ratiato())]
+    assert [(result.status, result.caster_id) for result in cast_batch(pairs).results] == [
+        (SpellOutcome.NOT_STUDIED, 0),
+        (SpellOutcome.CAST, 1)]
+
+def test_cast_batch_with_short_lived_casters():
+    pairs = ((Pupil(f'Pupil {number}', 2008, 'male', 2020), Charm.stuporus_ratiato()) for number in range(100))
+    batch = cast_batch(pairs)
+    assert {result.status for result in batch.results} == {SpellOutcome.NOT_STUDIED}
+    assert [batch.caster(result).name for result in batch.results] == [f'Pupil {number}' for number in range(100)]
+
+def test_spell_ids_are_stable():
+    assert Charm.liberula().spell_id == Charm.liberula().spell_id
+    assert Charm.liberula().spell_id != Charm.stuporus_ratiato().spell_id
@@ -0,0 +1,54 @@
+import pytest
+from magical_universe import Spell, Charm, Hex, Curse
+from spell_catalog import SpellCatalog
+
+@pytest.fixture
+def catalog():
+    return SpellCatalog.discover()
+
+def test_discover_finds_every_factory(catalog):
+    incantations = sorted(spell.incantation for spell in catalog)
+    assert incantations == ['Alteraro Canieo', 'Fiera Satanotis', 'Immolim', 'Inceptotis', 'Liberula',
+                            'Mufindo Immolim', 'Porim Perfite', 'Rectaro', 'Stuporus Ratiato']
+
+def test_with_incantation(catalog):
+    spell, = catalog.with_incantation('Liberula')
+    assert spell.name == 'The Liberula charm'
+    assert catalog.with_incantation('Abracadabra') == []
+
+def test_named(catalog):
+    spell, = catalog.named('Torture curse')
+    assert isinstance(spell, Curse)
+
+def test_of_type(catalog):
+    assert [spell.incantation for spell in catalog.of_type(Charm)] == ['Stuporus Ratiato', 'Liberula']
+    assert len(catalog.of_type(Spell)) == len(catalog)
+
+def test_learnable_in_year(catalog):
+    assert [spell.incantation for spell in catalog.learnable_in_year(3, Charm)] == ['Stuporus Ratiato']
+    assert sorted(spell.incantation for spell in catalog.learnable_in_year(1)) == \
+        ['Inceptotis', 'Mufindo Immolim', 'Stuporus Ratiato']
+
+def test_learnable_in_year_skips_spells_without_min_year(catalog):
+    assert catalog.learnable_in_year(100, Hex) == []
+
+def test_difficulty_queries(catalog):
+    assert sorted(spell.incantation for spell in catalog.with_difficulty('Difficult')) == \
+        ['Fiera Satanotis', 'Liberula', 'Porim Perfite', 'Rectaro']
+    assert [spell.incantation for spell in catalog.at_most_difficulty('Medium', Charm)] == ['Stuporus Ratiato']
+
+def test_add_keeps_indexes_sorted():
+    catalog = SpellCatalog()
+    for year in (5, 1, 3):
+        catalog.add(Charm(f'Charm {year}', f'Charmo {year}', 'Does charming things', min_year=year))
+    assert [spell.min_year for spell in catalog.learnable_in_year(4)] == [1, 3]
+    assert len(catalog) == 3
+
+def test_add_ignores_spells_already_in_the_catalog(catalog):
+    spell = next(iter(catalog))
+    catalog.add(spell)
+    assert len(catalog) == 9
+
+def test_add_raises_exception_for_non_spells(catalog):
+    with pytest.raises(TypeError):
+        catalog.add('Liberula')